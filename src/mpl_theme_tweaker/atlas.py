@@ -0,0 +1,213 @@
+"""TextureAtlas
+
+Functionality:
+    - Pack a list of images into a single RGBA atlas, every image is drawn
+      with the UV sub-rectangle of its region.
+    - Cache the packed atlas on disk, keyed by its sources, so that a later
+      start opens one PNG instead of every source image.
+    - Create the atlas texture lazily on the main thread, through the texture
+      registry, it is created again after an eviction.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from imgui_bundle import imgui  # type: ignore
+from PIL import Image
+
+from mpl_theme_tweaker.cache_folder import get_cache_folder
+from mpl_theme_tweaker.opengl import create_texture_from_image
+from mpl_theme_tweaker.texture_registry import registry
+
+# transparent pixels around every region, linear filtering doesn't bleed
+# into the neighbours
+ATLAS_PADDING = 1
+
+
+@dataclass
+class AtlasRegion:
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def _next_pow2(n: int) -> int:
+    return 1 << max(0, n - 1).bit_length()
+
+
+def pack_regions(
+    sizes: list[tuple[int, int]], padding: int = ATLAS_PADDING
+) -> tuple[tuple[int, int], list[AtlasRegion]]:
+    """Shelf-pack `sizes`, return the atlas size and the region of each one."""
+    if not sizes:
+        return (1, 1), []
+
+    area = sum((w + 2 * padding) * (h + 2 * padding) for w, h in sizes)
+    widest = max(w for w, _ in sizes) + 2 * padding
+    atlas_width = _next_pow2(max(widest, int(area**0.5)))
+
+    # tallest first, so that every shelf wastes little height
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    regions: list[AtlasRegion | None] = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w + 2 * padding > atlas_width:
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        regions[i] = AtlasRegion(x + padding, y + padding, w, h)
+        x += w + 2 * padding
+        shelf_height = max(shelf_height, h + 2 * padding)
+
+    atlas_height = _next_pow2(y + shelf_height)
+    return (atlas_width, atlas_height), regions  # type: ignore
+
+
+class TextureAtlas:
+    def __init__(self, image: Image.Image, regions: list[AtlasRegion]):
+        self.image = image
+        self.regions = regions
+        self._texture_ref: imgui.ImTextureRef | None = None
+        self._texture_id: int | None = None
+
+    @classmethod
+    def from_images(cls, images: list[Image.Image]) -> "TextureAtlas":
+        images = [image.convert("RGBA") for image in images]
+        size, regions = pack_regions([image.size for image in images])
+        atlas = Image.new("RGBA", size, (0, 0, 0, 0))
+        for image, region in zip(images, regions):
+            atlas.paste(image, (region.x, region.y))
+        return cls(atlas, regions)
+
+    @classmethod
+    def cached(
+        cls,
+        name: str,
+        key: str,
+        build: Callable[[], "list[Image.Image] | TextureAtlas"],
+        keep: int = 1,
+    ) -> "TextureAtlas":
+        """Load the atlas `name` packed for `key`, else pack `build()` and save it.
+
+        `key` must change whenever the images returned by `build` would, the
+        `keep` most recently used atlases of `name` stay on disk.
+        """
+        folder = get_cache_folder() / "atlas"
+        image_path = folder / f"{name}-{key}.png"
+        meta_path = folder / f"{name}-{key}.json"
+
+        try:
+            regions = [AtlasRegion(*rect) for rect in json.loads(meta_path.read_text())]
+            with Image.open(image_path) as image:
+                atlas = cls(image.convert("RGBA"), regions)
+            os.utime(image_path)
+            return atlas
+        except (OSError, ValueError, TypeError):
+            pass
+
+        built = build()
+        atlas = built if isinstance(built, TextureAtlas) else cls.from_images(built)
+        try:
+            folder.mkdir(parents=True, exist_ok=True)
+            # drop the least recently used atlases of `name`
+            old = sorted(
+                folder.glob(f"{name}-{'?' * len(key)}.png"),
+                key=lambda path: path.stat().st_mtime,
+                reverse=True,
+            )
+            for path in old[max(0, keep - 1) :]:
+                path.unlink(missing_ok=True)
+                path.with_suffix(".json").unlink(missing_ok=True)
+            _write_atomic(image_path, lambda path: atlas.image.save(path, "PNG"))
+            rects = [[r.x, r.y, r.width, r.height] for r in atlas.regions]
+            _write_atomic(meta_path, lambda path: path.write_text(json.dumps(rects)))
+        except OSError as e:
+            warnings.warn(f"Failed to cache the atlas {name}: {e}", UserWarning)
+        return atlas
+
+    @classmethod
+    def from_files(cls, name: str, paths: list[Path]) -> "TextureAtlas":
+        """Atlas of the image files `paths`, a missing file leaves a blank region."""
+        h = hashlib.blake2b(digest_size=8)
+        for path in paths:
+            try:
+                stat = path.stat()
+                h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+            except OSError:
+                h.update(f"{path}:missing;".encode())
+
+        def build() -> list[Image.Image]:
+            images = []
+            for path in paths:
+                if path.is_file():
+                    images.append(Image.open(path).convert("RGBA"))
+                else:
+                    warnings.warn(f"Image {path} does not exist.", UserWarning)
+                    images.append(Image.new("RGBA", (1, 1), (0, 0, 0, 0)))
+            return images
+
+        return cls.cached(name, h.hexdigest(), build)
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    @property
+    def texture_ref(self) -> imgui.ImTextureRef:
+        """The atlas texture, created on first use, call on the main thread."""
+        if self._texture_ref is None:
+            self._texture_id = create_texture_from_image(self.image)
+            registry.register(
+                self._texture_id,
+                self,
+                "atlas",
+                self.image.width,
+                self.image.height,
+                on_evict=self.release,
+            )
+            self._texture_ref = imgui.ImTextureRef(self._texture_id)
+        return self._texture_ref
+
+    def uv(self, index: int) -> tuple[tuple[float, float], tuple[float, float]]:
+        """UV coordinates of the top-left and bottom-right of region `index`."""
+        region = self.regions[index]
+        width, height = self.image.size
+        return (
+            (region.x / width, region.y / height),
+            ((region.x + region.width) / width, (region.y + region.height) / height),
+        )
+
+    def crop(self, index: int) -> Image.Image:
+        region = self.regions[index]
+        return self.image.crop(
+            (region.x, region.y, region.x + region.width, region.y + region.height)
+        )
+
+    def image_gui(self, index: int, size: tuple[float, float]) -> None:
+        uv0, uv1 = self.uv(index)
+        imgui.image(self.texture_ref, size, uv0, uv1)
+        return
+
+    def release(self) -> None:
+        if self._texture_id is not None:
+            registry.release(self._texture_id)
+        self._texture_id = None
+        self._texture_ref = None
+        return
+
+
+def _write_atomic(path: Path, write: Callable[[Path], None]) -> None:
+    # another instance may read the file meanwhile, never show a partial one
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return
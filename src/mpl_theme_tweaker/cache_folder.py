@@ -0,0 +1,24 @@
+"""Cache folder of the app
+
+Functionality:
+    - Per-user cache directory, for the caches kept between runs (atlases,
+      font catalog, glyph coverage).
+    - No GUI imports, render processes use it too.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+
+def get_cache_folder() -> Path:
+    """Per-user cache directory of the app, created if missing."""
+    if os.name == "nt":
+        base = Path(os.getenv("LOCALAPPDATA", Path.home() / "AppData" / "Local"))
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache"))
+    folder = base / "mpl-theme-tweaker"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
@@ -0,0 +1,55 @@
+"""Colormap gradient atlas
+
+Functionality:
+    - Sample the LUTs of every given colormap in one vectorized gather, one
+      atlas row per colormap.
+    - Cache the atlas on disk by the colormap names and the matplotlib
+      version, a warm start loads one small PNG.
+"""
+
+import hashlib
+
+import matplotlib as mpl
+import numpy as np
+from PIL import Image
+
+from mpl_theme_tweaker.atlas import AtlasRegion, TextureAtlas
+
+STRIP_WIDTH = 256
+
+
+def colormap_names() -> list[str]:
+    """Every registered colormap, reversed ones right after their original."""
+    return sorted(mpl.colormaps, key=str.lower)
+
+
+def colormap_strips(names: list[str], width: int = STRIP_WIDTH) -> np.ndarray:
+    """RGBA gradients of the colormaps `names`, shaped (len(names), width, 4)."""
+    cmaps = [mpl.colormaps[name] for name in names]
+    for cmap in cmaps:
+        if not cmap._isinit:  # type: ignore
+            cmap._init()  # type: ignore
+
+    # the LUT of every colormap, without its under, over and bad colors
+    sizes = np.array([cmap.N for cmap in cmaps])
+    luts = np.concatenate([cmap._lut[: cmap.N] for cmap in cmaps])  # type: ignore
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    # the LUT entry of every pixel center, as Colormap.__call__ picks it
+    x = (np.arange(width) + 0.5) / width
+    index = np.minimum((x[None, :] * sizes[:, None]).astype(int), sizes[:, None] - 1)
+    strips = luts[offsets[:, None] + index]
+    return (strips * 255).round().astype(np.uint8)
+
+
+def colormap_atlas(names: list[str]) -> TextureAtlas:
+    """Atlas with the gradient of `names[i]` in row i."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr((mpl.__version__, STRIP_WIDTH, names)).encode())
+
+    def build() -> TextureAtlas:
+        image = Image.fromarray(colormap_strips(names))
+        regions = [AtlasRegion(0, i, STRIP_WIDTH, 1) for i in range(len(names))]
+        return TextureAtlas(image, regions)
+
+    return TextureAtlas.cached("cmap", h.hexdigest(), build)
@@ -1,20 +1,39 @@
+from typing import Callable
+
 import matplotlib.pyplot as plt
 import numpy as np
 
 import matplotlib.colors as mcolors
 from matplotlib.patches import Rectangle
+from matplotlib.axes import Axes
 from matplotlib.figure import Figure
 
+from mpl_theme_tweaker.glyph_coverage import glyph_coverage
+
 
 # Fixing random state for reproducibility
 np.random.seed(19680801)
 
+FIGSIZE = (7.4, 5.8)
+SEED = 96917002
+SUPTITLE = "Figure Title | 中文 | にほんご | 한글 "
+
+# gid of the artists colored from axes.prop_cycle, see `paint.py`
+CYCLE_GID = "prop_cycle"
+
+
+def _from_cycle(artists):
+    """Mark `artists` as colored from the color cycle."""
+    for artist in artists:
+        artist.set_gid(CYCLE_GID)
+    return artists
+
 
 def plot_scatter(ax, prng, nb_samples=100):
     """Scatter plot."""
     for mu, sigma, marker in [(-0.5, 0.75, "o"), (0.75, 1.0, "s")]:
         x, y = prng.normal(loc=mu, scale=sigma, size=(2, nb_samples))
-        ax.plot(x, y, ls="none", marker=marker)
+        _from_cycle(ax.plot(x, y, ls="none", marker=marker))
     ax.set_xlabel("X-label")
     ax.set_ylabel("Y-label")
     ax.set_title("Axes title")
@@ -32,7 +51,9 @@ def plot_colored_lines(ax):
     shifts = np.linspace(-5, 5, nb_colors)
     amplitudes = np.linspace(1, 1.5, nb_colors)
     for t0, a in zip(shifts, amplitudes):
-        ax.plot(t, a * sigmoid(t, t0), label=f"$t_0$ = {t0:.1f}", markevery=10)
+        _from_cycle(
+            ax.plot(t, a * sigmoid(t, t0), label=f"$t_0$ = {t0:.1f}", markevery=10)
+        )
     ax.set_xlim(-10, 10)
     ax.legend(title="Legend title")
     return ax
@@ -43,8 +64,8 @@ def plot_bar_graphs(ax, prng, min_value=5, max_value=25, nb_samples=4):
     x = np.arange(nb_samples)
     ya, yb = prng.randint(min_value, max_value, size=(2, nb_samples))
     width = 0.35
-    ax.bar(x + width / 2, ya, width, hatch=r"//")
-    ax.bar(x + width * 3 / 2, yb, width, color="C2", hatch=r"\\")
+    _from_cycle(ax.bar(x + width / 2, ya, width, hatch=r"//"))
+    _from_cycle(ax.bar(x + width * 3 / 2, yb, width, color="C2", hatch=r"\\"))
     ax.set_xticks(x + width, labels=["a", "b", "c", "d"])
     return ax
 
@@ -58,17 +79,16 @@ def plot_colored_circles(ax, prng, nb_samples=15):
     of colors.
     """
     for sty_dict, j in zip(plt.rcParams["axes.prop_cycle"](), range(nb_samples)):
-        ax.add_patch(
-            plt.Circle(  # type: ignore
-                prng.normal(scale=3, size=2),
-                radius=1.0,
-                color=sty_dict["color"],
-            )
+        circle = plt.Circle(  # type: ignore
+            prng.normal(scale=3, size=2),
+            radius=1.0,
+            color=sty_dict["color"],
         )
+        _from_cycle([ax.add_patch(circle)])
     ax.grid(visible=True)
 
     # Add title for enabling grid
-    plt.title("ax.grid(True)", family="monospace", fontsize="small")
+    ax.set_title("ax.grid(True)", family="monospace", fontsize="small")
 
     ax.set_xlim([-4, 8])
     ax.set_ylim([-5, 6])
@@ -92,7 +112,10 @@ def plot_histograms(ax, prng, nb_samples=10000):
     params = ((10, 10), (4, 12), (50, 12), (6, 55))
     for a, b in params:
         values = prng.beta(a, b, size=nb_samples)
-        ax.hist(values, histtype="stepfilled", bins=30, alpha=0.8, density=True)
+        _, _, patches = ax.hist(
+            values, histtype="stepfilled", bins=30, alpha=0.8, density=True
+        )
+        _from_cycle(patches)
 
     # Add a small annotation.
     ax.annotate(
@@ -110,35 +133,103 @@ def plot_histograms(ax, prng, nb_samples=10000):
     return ax
 
 
-def plot_figure() -> Figure:
-    """Setup and plot the demonstration figure with a given style."""
+def plot_histograms_and_divider(ax, prng):
+    plot_histograms(ax, prng)
+
+    # add divider
+    rec = Rectangle((0.025, 12.5), 0.9, 1, clip_on=False, linewidth=2)
+    ax.add_artist(rec)
+    return ax
+
+
+# The demo panels in plotting order, each is called as `plot(ax, prng)`.
+PANELS: list[tuple[str, Callable[[Axes, np.random.RandomState], Axes | None]]] = [
+    ("scatter", plot_scatter),
+    ("image", plot_image_and_patch),
+    ("bars", plot_bar_graphs),
+    ("lines", lambda ax, prng: plot_colored_lines(ax)),
+    ("histograms", plot_histograms_and_divider),
+    ("circles", plot_colored_circles),
+]
+PANEL_GRID = (2, 3)  # nrows, ncols
+
+
+# state of the shared random stream at the start of every panel, see
+# `panel_prng`
+_panel_states: list[tuple] = []
+
+
+def panel_prng(index: int) -> np.random.RandomState:
+    """The random stream of the full figure, where it reaches panel `index`.
+
+    A panel plotted alone draws the same "random" values as in the full
+    figure. Only the last panel draws a style dependent amount of values, so
+    the states are recorded once, by building the full figure.
+    """
+    if not _panel_states:
+        plot_figure()
+    prng = np.random.RandomState()
+    prng.set_state(_panel_states[index])
+    return prng
+
+
+def plot_figure(dpi: float | None = None) -> Figure:
+    """Setup and plot the demonstration figure with a given style.
+
+    `dpi` overrides figure.dpi, e.g. for a draft preview.
+    """
     # Use a dedicated RandomState instance to draw the same "random" values
     # across the different figures.
-    prng = np.random.RandomState(96917002)
+    prng = np.random.RandomState(SEED)
 
-    fig, axs = plt.subplots(
-        ncols=3,
-        nrows=2,
-        figsize=(7.4, 5.8),
-        layout="constrained",
-    )
+    # Build the figure without pyplot, so it can be rendered off the main
+    # thread and doesn't need to be closed.
+    nrows, ncols = PANEL_GRID
+    fig = Figure(figsize=FIGSIZE, dpi=dpi, layout="constrained")
+    axs = fig.subplots(ncols=ncols, nrows=nrows)
     axs = axs.flatten()
 
     fig.suptitle("Figure Title", x=0.01, ha="left")
 
-    plot_scatter(axs[0], prng)
-    plot_image_and_patch(axs[1], prng)
-    plot_bar_graphs(axs[2], prng)
-    plot_colored_lines(axs[3])
-    plot_histograms(axs[4], prng)
-    plot_colored_circles(axs[5], prng)
+    states = []
+    for ax, (_, plot_panel) in zip(axs, PANELS):
+        states.append(prng.get_state())
+        plot_panel(ax, prng)
+    if not _panel_states:
+        _panel_states.extend(states)
 
-    # add divider
-    rec = Rectangle((0.025, 12.5), 0.9, 1, clip_on=False, linewidth=2)
+    fig.suptitle(SUPTITLE, family=title_family())
+    fig.set(linewidth=2)
+
+    return fig
 
-    axs[4].add_artist(rec)
 
-    fig.suptitle("Figure Title | 中文 | にほんご | 한글 ")
-    fig.set(linewidth=2)
+def title_family() -> list[str] | None:
+    """font.family plus the fonts with the CJK glyphs of the title it misses.
+
+    A kept figure is rebuilt when it changes, e.g. once the glyph index is
+    loaded.
+    """
+    family = plt.rcParams["font.family"]
+    fallbacks = glyph_coverage.fallback_families(SUPTITLE, family)
+    if not fallbacks:
+        return None
+    return [*family, *fallbacks]
+
+
+def plot_panel_figure(
+    index: int, figsize: tuple[float, float], dpi: float | None = None
+) -> Figure:
+    """Plot a single demo panel on its own figure."""
+    fig = Figure(figsize=figsize, dpi=dpi, layout="constrained")
+    ax = fig.subplots()
+    _, plot_panel = PANELS[index]
+    plot_panel(ax, panel_prng(index))
+    return fig
+
 
+def plot_title_figure(figsize: tuple[float, float], dpi: float | None = None) -> Figure:
+    """Plot the title strip of the demo figure on its own figure."""
+    fig = Figure(figsize=figsize, dpi=dpi)
+    fig.suptitle(SUPTITLE, y=0.5, va="center", family=title_family())
     return fig
@@ -1,58 +1,346 @@
-from imgui_bundle import hello_imgui, imgui, implot  # type: ignore
+import math
+import time
+from typing import Any
+
+from imgui_bundle import hello_imgui, icons_fontawesome_6, imgui, implot  # type: ignore
 import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-from PIL.Image import Image
-
-from mpl_theme_tweaker.figure import plot_figure
-from mpl_theme_tweaker.mpl_utils import Figure2Image
-from mpl_theme_tweaker.opengl import (
-    create_texture_from_image,
-    rebind_texture_from_image,
+import numpy as np
+
+from mpl_theme_tweaker.figure import FIGSIZE
+from mpl_theme_tweaker.glyph_coverage import glyph_coverage
+from mpl_theme_tweaker.opengl import StreamingTexture
+from mpl_theme_tweaker.render_cache import RenderCache, frame_digest, rc_hash
+from mpl_theme_tweaker.render import (
+    ProcessRenderPool,
+    RenderBackend,
+    RenderBackendName,
+    RenderResult,
+    create_render_backend,
+    format_timings,
+    snapshot_rcparams,
 )
-from mpl_theme_tweaker._global import set_app_key
+from mpl_theme_tweaker.scheduler import is_dragging
+from mpl_theme_tweaker.style_manager.style_cache import StyleSpec
+from mpl_theme_tweaker.style_warmup import StyleWarmup
+from mpl_theme_tweaker._global import get_app_key, set_app_key
+
+# never draft below this dpi, the text gets unreadable
+MIN_DRAFT_DPI = 24
 
 
 class FigureWindow:
     def __init__(self):
         plt.style.use("default")
-        self.figure: Figure = plot_figure()
-        self.image: Image = Figure2Image(self.figure)
-        self.texture_id: int = None  # type: ignore
+        self.worker: RenderBackend = create_render_backend("thread")
+        self.backend_options: tuple[RenderBackendName, int, bool] = ("thread", 0, False)
+        self.frame: np.ndarray | None = None
+        self.frame_digest: str = ""
+        # size of the full resolution frame, a draft is stretched to it
+        self.image_size: tuple[int, int] = (0, 0)
+        # the frame on display, the next one uploads in the back meanwhile
+        self.texture = StreamingTexture("preview")
         self.replot_times: int = 0
+        self.uploads: int = 0
+        self.skipped_uploads: int = 0
+        self.uploaded_bytes: int = 0
+        self.cache = RenderCache()
+        # previews of the styles of the Style menu, rendered ahead, opt-in
+        self.warmup = StyleWarmup()
+        # generation and cache key of the latest submitted job
+        self.pending: tuple[int, str] | None = None
+        # every rc key read by the renders so far, see `track_rc_reads`
+        self.read_keys: set[str] = set()
+        # the glyph index the cached frames were rendered with
+        self.glyph_coverage_version: int = glyph_coverage.version
+
+        # progressive preview: a draft capped to the window resolution first,
+        # the full resolution once the input was idle for `refine_delay`
+        self.progressive: bool = True
+        self.refine_delay: float = 0.5
+        # the dpi the plot area of the window can show, 0 before the first gui
+        self.view_dpi: float = 0.0
+        # rc snapshot and cache key of the full render owed after a draft
+        self.refine: tuple[dict[str, Any], str] | None = None
+        self.last_request_time: float = 0.0
+
         self.plot_flags = implot.Flags_.equal + implot.Flags_.no_legend
         set_app_key("FigureWidow.replot_func", self.replot)
+        set_app_key("FigureWindow.set_render_backend", self.set_render_backend)
+        set_app_key("FigureWindow.set_render_cache_size", self.set_render_cache_size)
+        set_app_key("FigureWindow.reads_any", self.reads_any)
+        set_app_key("FigureWindow.get_read_keys", self.get_read_keys)
+        set_app_key("FigureWindow.set_progressive", self.set_progressive)
+        set_app_key("FigureWindow.set_warm_up", self.set_warm_up)
+
+        self.request_render()
+
+    def get_image_size(self) -> tuple[int, int]:
+        return self.image_size
 
     def gui(self) -> None:
-        if self.texture_id is None:
-            self.texture_id: int = create_texture_from_image(self.image)
-            self.texture_ref = imgui.ImTextureRef(self.texture_id)
+        result = self.worker.poll()
+        if result is not None:
+            self.on_render_finished(result)
+        self.glyph_coverage_check()
+        self.refine_check()
+        self.warmup.poll(self.is_idle(), self.cache)
+
+        self.texture.poll()
+        if self.texture.texture_id is None:
+            imgui.text(f"{icons_fontawesome_6.ICON_FA_SPINNER} rendering...")
+            return
 
+        pos = imgui.get_cursor_screen_pos()
+        avail = imgui.get_content_region_avail()
+        scale = imgui.get_io().display_framebuffer_scale.x
+        self.view_dpi = min(avail.x / FIGSIZE[0], avail.y / FIGSIZE[1]) * scale
         if implot.begin_plot("##image", [-1, -1], flags=self.plot_flags):
             implot.setup_axes(
                 x_label="", y_label="", x_flags=implot.AxisFlags_.opposite
             )
 
-            bounds_min, bounds_max = implot.Point(0, 0), implot.Point(*self.image.size)
-            implot.plot_image("Demo Figure", self.texture_ref, bounds_min, bounds_max)
+            bounds_min = implot.Point(0, 0)
+            bounds_max = implot.Point(*self.get_image_size())
+            texture_ref = imgui.ImTextureRef(self.texture.texture_id)
+            implot.plot_image("Demo Figure", texture_ref, bounds_min, bounds_max)
             implot.end_plot()
+
+        status = ""
+        if self.worker.is_busy():
+            status = f"{icons_fontawesome_6.ICON_FA_SPINNER} rendering..."
+        elif self.refine is not None:
+            status = f"{icons_fontawesome_6.ICON_FA_HOURGLASS_HALF} draft"
+        if status:
+            imgui.get_window_draw_list().add_text(
+                imgui.ImVec2(pos.x + 8, pos.y + 8),
+                imgui.get_color_u32(imgui.Col_.text),
+                status,
+            )
+        return
+
+    def glyph_coverage_check(self) -> None:
+        """Render again once the glyph index is loaded or rebuilt.
+
+        The title gets its fallback fonts, the frames cached without them are
+        dropped, their keys don't tell.
+        """
+        if self.glyph_coverage_version == glyph_coverage.version:
+            return
+        self.glyph_coverage_version = glyph_coverage.version
+        self.cache.clear()
+        self.warmup.cache.clear()
+        self.replot()
         return
 
     def replot(self) -> None:
         self.replot_times += 1
         hello_imgui.log(hello_imgui.LogLevel.info, f"replot {self.replot_times}")
 
-        if self.figure:
-            plt.close(self.figure)
-            self.figure = None  # type: ignore
-        try:
-            self.figure = plot_figure()
-        except Exception as e:
-            hello_imgui.log(hello_imgui.LogLevel.error, f"Error: {str(e)}")
-            self.figure = None  # type: ignore
+        self.request_render(log_cache=True)
+        return
+
+    def request_render(self, log_cache: bool = False) -> None:
+        rc = self.snapshot()
+        key = rc_hash(rc)
+        dpi = plt.rcParams["figure.dpi"]
+        self.image_size = (int(FIGSIZE[0] * dpi), int(FIGSIZE[1] * dpi))
+        self.last_request_time = time.perf_counter()
+        self.refine = None
+
+        frame = self.cache.get(key)
+        if frame is None:
+            frame = self.warmup.get(key)
+        if log_cache:
+            hit = "hit" if frame is not None else "miss"
+            hello_imgui.log(
+                hello_imgui.LogLevel.info,
+                f"render cache {hit} ({self.cache.stats_text()})",
+            )
+
+        if frame is not None:
+            # drop the render of an older state still in flight
+            self.worker.cancel()
+            self.pending = None
+            self.show_frame(frame)
             return
 
-        self.image = Figure2Image(self.figure)
-        rebind_texture_from_image(self.texture_id, self.image)
-        self.texture_ref = imgui.ImTextureRef(self.texture_id)
+        draft_dpi = self.get_draft_dpi(dpi)
+        if draft_dpi is not None:
+            self.refine = (rc, key)
+            key = f"{key}@{draft_dpi}"
+            frame = self.cache.get(key)
+            if frame is not None:
+                self.worker.cancel()
+                self.pending = None
+                self.show_frame(frame)
+                return
+
+        # render on the worker thread, the texture is swapped in `gui` once
+        # the frame is ready
+        generation = self.worker.submit(rc, draft_dpi)
+        self.pending = (generation, key)
+        return
+
+    def get_draft_dpi(self, dpi: float) -> int | None:
+        """The dpi of the draft render, None if the full render is cheap."""
+        if not self.progressive or self.view_dpi <= 0:
+            return None
+        draft_dpi = max(math.floor(self.view_dpi), MIN_DRAFT_DPI)
+        if draft_dpi >= dpi:
+            return None
+        return draft_dpi
+
+    def refine_check(self) -> None:
+        """Render the full resolution once the draft is done and input idle."""
+        if self.refine is None or self.pending is not None:
+            return
+        if time.perf_counter() - self.last_request_time < self.refine_delay:
+            return
+        if is_dragging():
+            return
+
+        rc, key = self.refine
+        self.refine = None
+        generation = self.worker.submit(rc)
+        self.pending = (generation, key)
+        return
+
+    def is_idle(self) -> bool:
+        """No render in flight or owed, and no drag."""
+        return (
+            not self.worker.is_busy()
+            and self.pending is None
+            and self.refine is None
+            and not is_dragging()
+        )
+
+    def warm_up(self, targets: list[tuple[StyleSpec, ...]]) -> None:
+        """Pre-render the styles `targets`, each applied on the current state."""
+        self.warmup.plan(self.snapshot(), targets)
+        return
+
+    def set_warm_up(self, enabled: bool, cache_mb: int) -> None:
+        self.warmup.set_options(enabled, cache_mb, self.backend_options[2])
+        return
+
+    def set_progressive(self, enabled: bool, refine_delay_ms: int) -> None:
+        self.progressive = enabled
+        self.refine_delay = refine_delay_ms / 1000
+        return
+
+    def snapshot(self) -> dict[str, Any]:
+        if isinstance(self.worker, ProcessRenderPool):
+            # pool processes start from the defaults, only send what the
+            # editor covers
+            get_rc_dict = get_app_key("ParamsWindow.get_rc_dict")
+            if get_rc_dict is not None:
+                return get_rc_dict()
+        return snapshot_rcparams()
+
+    def set_render_backend(
+        self, name: RenderBackendName, max_workers: int, tiled: bool = False
+    ) -> None:
+        # the worker count only matters to the process pool
+        options = (name, max_workers if name == "process" else 0, tiled)
+        if options == self.backend_options:
+            return
+        self.backend_options = options
+
+        self.worker.shutdown()
+        self.worker = create_render_backend(name, max_workers, tiled)
+        # frames of the full figure and of the tiles differ slightly
+        self.cache.clear()
+        self.warmup.set_options(
+            self.warmup.enabled, self.warmup.cache.max_bytes // 2**20, tiled
+        )
+        self.pending = None
+        self.refine = None
+
+        mode = "incremental panels" if tiled else "full figure"
+        hello_imgui.log(
+            hello_imgui.LogLevel.info, f"Render backend set to {name}, {mode}."
+        )
+        self.request_render()
+        return
+
+    def reads_any(self, keys: set[str]) -> bool:
+        """Whether the preview reads one of `keys`, True until it was rendered."""
+        if not self.read_keys:
+            return True
+        return not self.read_keys.isdisjoint(keys)
+
+    def get_read_keys(self) -> set[str]:
+        return self.read_keys
+
+    def set_render_cache_size(self, megabytes: int) -> None:
+        self.cache.set_max_bytes(megabytes * 2**20)
+        return
+
+    def on_render_finished(self, result: RenderResult) -> None:
+        if result.error or result.frame is None:
+            hello_imgui.log(hello_imgui.LogLevel.error, f"Error: {result.error}")
+            return
+
+        height, width = result.frame.shape[:2]
+        hello_imgui.log(
+            hello_imgui.LogLevel.info,
+            f"render {result.generation} ({width}x{height}) finished in"
+            f" {result.elapsed * 1000:.0f} ms ({format_timings(result.timings)})",
+        )
+
+        # matplotlib caches some lookups, so a render may not read everything
+        # an earlier one did, keep the union
+        self.read_keys |= result.read_keys
+
+        if self.pending is not None and self.pending[0] == result.generation:
+            if result.consistent:
+                self.cache.put(self.pending[1], result.frame)
+            self.pending = None
+
+        self.show_frame(result.frame, result.digest)
+        return
+
+    def show_frame(self, frame: np.ndarray, digest: str = "") -> None:
+        if frame is self.frame:
+            digest = self.frame_digest
+        elif not digest:
+            digest = frame_digest(frame)
+        if self.frame is not None and digest == self.frame_digest:
+            # e.g. an edit of a key the figure doesn't show, nothing to upload
+            self.skipped_uploads += 1
+            hello_imgui.log(
+                hello_imgui.LogLevel.debug, "frame unchanged, skipped texture upload"
+            )
+            return
+
+        # shown by `gui` once the upload completed
+        nbytes = self.texture.upload(frame)
+        hello_imgui.log(
+            hello_imgui.LogLevel.debug,
+            f"texture upload {nbytes / 2**10:.0f} of {frame.nbytes / 2**10:.0f} KB",
+        )
+        self.uploads += 1
+        self.uploaded_bytes += nbytes
+        self.frame = frame
+        self.frame_digest = digest
+        return
+
+    def status_text(self) -> str:
+        text = (
+            f"uploads {self.uploads} / skipped {self.skipped_uploads}"
+            f" ({self.uploaded_bytes / 2**20:.1f} MB)"
+        )
+        if self.warmup.enabled:
+            text += f", {self.warmup.status_text()}"
+        return text
+
+    def gui_status(self) -> None:
+        imgui.same_line()
+        imgui.text_disabled(self.status_text())
+        return
 
+    def shutdown(self) -> None:
+        self.worker.shutdown()
+        self.warmup.shutdown()
+        self.texture.release()
         return
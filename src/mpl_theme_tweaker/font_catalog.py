@@ -0,0 +1,133 @@
+"""FontCatalog
+
+Functionality:
+    - Enumerate the font names, and the file of every name, on a background
+      thread instead of at import time.
+    - Keep the sorted result in a cache file, keyed on matplotlib's font list
+      file, a later start loads it without reading the font manager.
+    - Tell the GUI whether the catalog is ready, it shows a placeholder
+      meanwhile.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import warnings
+
+import matplotlib as mpl
+from matplotlib import font_manager
+from matplotlib.font_manager import FontEntry
+
+from mpl_theme_tweaker.cache_folder import get_cache_folder
+
+
+def font_files(entries: list[FontEntry]) -> dict[str, str]:
+    """The file of every font name, the regular face when there is one."""
+
+    def distance(entry: FontEntry) -> tuple[int, int]:
+        weight = entry.weight if isinstance(entry.weight, int) else 400
+        return (entry.style != "normal", abs(weight - 400))
+
+    files: dict[str, tuple[tuple[int, int], str]] = {}
+    for entry in entries:
+        best = files.get(entry.name)
+        if best is None or distance(entry) < best[0]:
+            files[entry.name] = (distance(entry), entry.fname)
+    return {name: fname for name, (_, fname) in files.items()}
+
+
+def font_catalog_key() -> str:
+    """Changes when matplotlib's font list file is written again.
+
+    The font manager is read from that file, and the font cache rebuild
+    writes it, so the fonts can't change without it.
+    """
+    path = os.path.join(
+        mpl.get_cachedir(),
+        f"fontlist-v{font_manager.FontManager.__version__}.json",  # type: ignore
+    )
+    h = hashlib.blake2b(digest_size=8)
+    h.update(mpl.__version__.encode())
+    try:
+        stat = os.stat(path)
+        h.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    except OSError:
+        h.update(f"{path}:missing".encode())
+    return h.hexdigest()
+
+
+class FontCatalog:
+    """The font names of the system, `names` is None until loaded."""
+
+    def __init__(self):
+        # "None" first, it clears a font slot
+        self.names: list[str] | None = None
+        self.files: dict[str, str] = {}
+        # bumped whenever the fonts are replaced, widgets rebuild on a change
+        self.version: int = 0
+
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def is_ready(self) -> bool:
+        return self.names is not None
+
+    def load_async(self, use_cache: bool = True) -> None:
+        """Enumerate the fonts on a background thread, unless already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._load, args=(use_cache,), name="FontCatalog", daemon=True
+            )
+            self._thread.start()
+        return
+
+    def update(self, entries: list[FontEntry]) -> None:
+        """Replace the fonts with `entries` at once, call on the main thread."""
+        files = font_files(entries)
+        self.files = files
+        self.names = ["None"] + sorted(files)
+        self.version += 1
+        self._save(font_catalog_key(), self.names, files)
+        return
+
+    def _load(self, use_cache: bool) -> None:
+        key = font_catalog_key()
+
+        if use_cache:
+            try:
+                path = get_cache_folder() / "font_catalog.json"
+                data = json.loads(path.read_text(encoding="utf-8"))
+                if data["key"] == key:
+                    self.files = data["files"]
+                    self.names = data["names"]
+                    return
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+
+        files = font_files(font_manager.fontManager.ttflist)
+        names = ["None"] + sorted(files)
+        # files first, `names` announces that the catalog is ready
+        self.files = files
+        self.names = names
+        self._save(key, names, files)
+        return
+
+    def _save(self, key: str, names: list[str], files: dict[str, str]) -> None:
+        path = get_cache_folder() / "font_catalog.json"
+        data = {"key": key, "names": names, "files": files}
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            warnings.warn(f"Failed to cache the font catalog: {e}", UserWarning)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return
+
+
+# the fonts of the system, shared by every font widget
+font_catalog = FontCatalog()
@@ -0,0 +1,280 @@
+"""FontPicker
+
+Functionality:
+    - Combo of font names, each row shows a sample rendered in that font.
+    - Samples are rasterized with FT2Font on a background thread, only for
+      the rows which scroll into view, the latest requests first.
+    - The sample textures are kept in an LRU cache, through the texture
+      registry.
+    - A type-to-filter box, narrowing the last result while the text grows.
+    - A "can render" box, keeping the fonts with a glyph for every character
+      of the given string.
+"""
+
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+from imgui_bundle import imgui  # type: ignore
+from matplotlib.font_manager import get_font
+
+from mpl_theme_tweaker.glyph_coverage import glyph_coverage
+from mpl_theme_tweaker.opengl import create_texture_from_array
+from mpl_theme_tweaker.texture_registry import registry
+
+SAMPLE_TEXT = "AaBbGg 0123"
+# pixel size of the samples, 2x the UI text for high dpi screens
+SAMPLE_SIZE = 32
+SAMPLE_CACHE_SIZE = 256
+# requests beyond it are dropped, oldest first, they scrolled out of view
+MAX_PENDING_SAMPLES = 64
+# textures created per frame, to keep the frame time flat while scrolling
+MAX_UPLOADS_PER_FRAME = 8
+
+
+def render_font_sample(
+    path: str, text: str = SAMPLE_TEXT, size: int = SAMPLE_SIZE
+) -> np.ndarray | None:
+    """White RGBA sample of the font at `path`, None if it draws no glyph."""
+    font = get_font(path)
+    font.set_size(size, 72)
+    # symbol fonts miss the latin glyphs, they simply draw nothing, the
+    # warnings are ignored by `ignore_font_warnings`
+    font.set_text(text)
+    font.draw_glyphs_to_bitmap()
+    coverage = np.asarray(font.get_image())
+    if not coverage.any():
+        return None
+
+    sample = np.full((*coverage.shape, 4), 255, dtype=np.uint8)
+    sample[..., 3] = coverage
+    return sample
+
+
+class FontSampleCache:
+    """Font samples by name, rendered on demand by a background thread.
+
+    `get` and `poll` are called on the main thread, which owns the textures.
+    """
+
+    def __init__(
+        self, files: dict[str, str], capacity: int = SAMPLE_CACHE_SIZE
+    ) -> None:
+        self.files = files
+        self.capacity = capacity
+
+        # name -> (texture ref, width, height), None if the font has no sample
+        self._textures: OrderedDict[str, tuple[imgui.ImTextureRef, int, int] | None] = (
+            OrderedDict()
+        )
+        self._texture_ids: dict[str, int] = {}
+        self._pending: deque[str] = deque(maxlen=MAX_PENDING_SAMPLES)
+        self._queued: set[str] = set()
+        self._done: list[tuple[str, np.ndarray | None]] = []
+        self._cond = threading.Condition()
+        self._closed: bool = False
+
+        self._thread = threading.Thread(
+            target=self._run, name="FontSamples", daemon=True
+        )
+        self._thread.start()
+
+    def get(self, name: str) -> tuple[imgui.ImTextureRef, int, int] | None:
+        """The sample of `name`, requested and None if not rendered yet."""
+        if name in self._textures:
+            self._textures.move_to_end(name)
+            return self._textures[name]
+        if name not in self.files:
+            return None
+
+        with self._cond:
+            if name in self._pending:
+                # seen again, render it before the rows scrolled past
+                self._pending.remove(name)
+            elif name in self._queued:
+                # rendered, waiting for `poll`
+                return None
+            elif len(self._pending) == self._pending.maxlen:
+                self._queued.discard(self._pending[0])
+            self._pending.append(name)
+            self._queued.add(name)
+            self._cond.notify()
+        return None
+
+    def poll(self) -> None:
+        """Create the textures of the finished samples, call once per frame."""
+        with self._cond:
+            done = self._done[:MAX_UPLOADS_PER_FRAME]
+            del self._done[:MAX_UPLOADS_PER_FRAME]
+            # requested from now on only if evicted again
+            self._queued.difference_update(name for name, _ in done)
+
+        for name, sample in done:
+            if sample is None:
+                self._textures[name] = None
+            else:
+                texture_id = create_texture_from_array(sample)
+                registry.register(
+                    texture_id,
+                    self,
+                    "sample",
+                    sample.shape[1],
+                    sample.shape[0],
+                    on_evict=self.clear,
+                )
+                self._texture_ids[name] = texture_id
+                self._textures[name] = (
+                    imgui.ImTextureRef(texture_id),
+                    sample.shape[1],
+                    sample.shape[0],
+                )
+
+        while len(self._textures) > self.capacity:
+            name, _ = self._textures.popitem(last=False)
+            self._release(name)
+        return
+
+    def clear(self) -> None:
+        for name in list(self._texture_ids):
+            self._release(name)
+        self._textures.clear()
+        return
+
+    def close(self) -> None:
+        """Stop the sample thread and free the textures."""
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._done.clear()
+            self._cond.notify()
+        self.clear()
+        return
+
+    def _release(self, name: str) -> None:
+        texture_id = self._texture_ids.pop(name, None)
+        if texture_id is not None:
+            registry.release(texture_id)
+        return
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # the latest request is the row on screen now
+                name = self._pending.pop()
+
+            try:
+                sample = render_font_sample(self.files[name])
+            except Exception:
+                sample = None
+
+            with self._cond:
+                if not self._closed:
+                    self._done.append((name, sample))
+
+
+class FontPicker:
+    """Combo of font names, shared by every font slot of the font table."""
+
+    def __init__(self, names: list[str], files: dict[str, str]) -> None:
+        self.names = names
+        self.samples = FontSampleCache(files)
+
+        self.filter_text: str = ""
+        self.render_text: str = ""
+        self._filtered: list[str] = names
+        self._lower: dict[str, str] = {name: name.lower() for name in names}
+
+    def set_filter(self, text: str, render_text: str | None = None) -> None:
+        query = text.lower()
+        if render_text is None or render_text == self.render_text:
+            render_text = self.render_text
+            grows = query.startswith(self.filter_text.lower())
+        else:
+            grows = False
+        # narrowing the text only narrows the result
+        candidates = self._filtered if grows else self.names
+
+        self._filtered = [
+            name
+            for name in candidates
+            if query in self._lower[name]
+            and (not render_text or self._can_render(name, render_text))
+        ]
+        self.filter_text = text
+        self.render_text = render_text
+        return
+
+    def close(self) -> None:
+        self.samples.close()
+        return
+
+    def _can_render(self, name: str, text: str) -> bool:
+        path = self.samples.files.get(name)
+        return path is not None and glyph_coverage.covers(path, text)
+
+    def gui(self, label: str, current: str) -> tuple[bool, str]:
+        """Draw the combo, return whether a font was picked and its name."""
+        picked = current
+        flags = imgui.ComboFlags_.height_large.value
+        if not imgui.begin_combo(label, current, flags):
+            return False, current
+        # only one combo is open at a time, so this runs once per frame
+        self.samples.poll()
+
+        if imgui.is_window_appearing():
+            imgui.set_keyboard_focus_here()
+        imgui.push_item_width(-1)
+        changed, text = imgui.input_text_with_hint(
+            "##filter", "Filter", self.filter_text
+        )
+        imgui.pop_item_width()
+        if changed:
+            self.set_filter(text)
+
+        if glyph_coverage.is_ready():
+            imgui.push_item_width(-1)
+            changed, text = imgui.input_text_with_hint(
+                "##render", "Can render...", self.render_text
+            )
+            imgui.pop_item_width()
+            if changed:
+                self.set_filter(self.filter_text, text)
+
+        row_height = imgui.get_frame_height_with_spacing()
+        imgui.begin_child("##fonts", (0, 16 * row_height))
+        clipper = imgui.ListClipper()
+        clipper.begin(len(self._filtered), row_height)
+        while clipper.step():
+            for i in range(clipper.display_start, clipper.display_end):
+                name = self._filtered[i]
+                if self._row_gui(name, name == current):
+                    picked = name
+        clipper.end()
+        imgui.end_child()
+
+        if picked != current:
+            imgui.close_current_popup()
+        imgui.end_combo()
+        return picked != current, picked
+
+    def _row_gui(self, name: str, selected: bool) -> bool:
+        row_height = imgui.get_frame_height()
+        sample_x = imgui.get_cursor_pos_x() + imgui.get_content_region_avail().x / 2
+        clicked, _ = imgui.selectable(f"{name}##{name}", selected, size=(0, row_height))
+
+        sample = self.samples.get(name)
+        if sample is not None:
+            texture_ref, width, height = sample
+            # the sample on the right half, scaled to the row height
+            scale = row_height / height
+            imgui.same_line(sample_x)
+            imgui.image_with_bg(
+                texture_ref,
+                (width * scale, row_height),
+                tint_col=imgui.get_style_color_vec4(imgui.Col_.text.value),
+            )
+        return clicked
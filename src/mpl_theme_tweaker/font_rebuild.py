@@ -0,0 +1,298 @@
+"""FontCacheRebuild
+
+Functionality:
+    - Rebuild matplotlib's font cache on a background thread, re-parsing only
+      the font files added or modified since the last rebuild, the others
+      keep their cached entries.
+    - Parse the font files in a pool of processes, in chunks.
+    - Report the progress for the status bar.
+    - Hand the new FontManager to the main thread, which installs it and
+      refreshes the font catalog in one step.
+    - Install the new fonts in matplotlib's font manager in place, the
+      render processes load the rebuilt cache file before their next job.
+"""
+
+import dataclasses
+import json
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Literal
+
+import matplotlib as mpl
+from matplotlib import _afm, cbook, font_manager, ft2font  # type: ignore
+from matplotlib.font_manager import (
+    FontEntry,
+    FontManager,
+    afmFontProperty,
+    findSystemFonts,
+    json_dump,
+    json_load,
+    ttfFontProperty,
+)
+
+from mpl_theme_tweaker.cache_folder import get_cache_folder
+
+FontKind = Literal["afm", "ttf"]
+
+FONT_PARSE_CHUNK = 32
+
+# mtime of the font cache file the font manager of this process was read from
+_loaded_mtime: int | None = None
+
+
+def font_manager_path() -> Path:
+    """matplotlib's font cache file, read at import."""
+    return Path(mpl.get_cachedir(), f"fontlist-v{FontManager.__version__}.json")
+
+
+def scan_font_paths() -> list[tuple[FontKind, str]]:
+    """Every font file, in the order FontManager adds them."""
+    paths = [
+        cbook._get_data_path("fonts", subdir)
+        for subdir in ["ttf", "afm", "pdfcorefonts"]
+    ]
+    fonts: list[tuple[FontKind, str]] = []
+    for fontext in ["afm", "ttf"]:
+        for path in [
+            *findSystemFonts(paths, fontext=fontext),
+            *findSystemFonts(fontext=fontext),
+        ]:
+            fonts.append((fontext, os.fsdecode(path)))  # type: ignore
+    return fonts
+
+
+def _parse_font_files(paths: list[str]) -> list[FontEntry | None]:
+    """Font properties of every file, as FontManager.addfont reads them."""
+    entries: list[FontEntry | None] = []
+    for path in paths:
+        try:
+            if Path(path).suffix.lower() == ".afm":
+                with open(path, "rb") as fh:
+                    entries.append(afmFontProperty(path, _afm.AFM(fh)))
+            else:
+                entries.append(ttfFontProperty(ft2font.FT2Font(path)))
+        except Exception:
+            entries.append(None)
+    return entries
+
+
+def _file_stamp(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def install_font_manager(fm: FontManager) -> None:
+    """Install the fonts of `fm` in matplotlib's font manager, in place.
+
+    The Agg backend and mathtext hold the manager and its `findfont` since
+    import, they see the new fonts too.
+    """
+    current = font_manager.fontManager
+    if fm is not current:
+        current.afmlist = fm.afmlist
+        current.ttflist = fm.ttflist
+    FontManager._findfont_cached.cache_clear()
+    font_manager._get_font.cache_clear()
+    return
+
+
+def sync_font_cache() -> None:
+    """Load the font cache file again if a rebuild replaced it.
+
+    Called by the render processes before each job, the first call records
+    the file read at import.
+    """
+    global _loaded_mtime
+    path = font_manager_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return
+    if _loaded_mtime is None:
+        _loaded_mtime = mtime
+        return
+    if mtime == _loaded_mtime:
+        return
+
+    try:
+        fm = json_load(path)
+    except (OSError, ValueError):
+        return
+    install_font_manager(fm)
+    _loaded_mtime = mtime
+    return
+
+
+class FontCacheRebuild:
+    """Rebuild the font cache, call `poll` once per frame on the main thread."""
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+
+        self.total: int = 0
+        self.done: int = 0
+        self.parsed: int = 0
+        self.reused: int = 0
+        self.failed: int = 0
+        self.elapsed: float = 0.0
+        self.error: str = ""
+
+        self._result: FontManager | None = None
+        self._finished = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="FontCacheRebuild", daemon=True
+        )
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        return not self._finished.is_set()
+
+    def poll(self) -> FontManager | None:
+        """The new font manager once, after the rebuild finished."""
+        if not self._finished.is_set():
+            return None
+        result, self._result = self._result, None
+        return result
+
+    def status_text(self) -> str:
+        if self.is_running():
+            return f"rebuilding font cache {self.done} / {self.total}"
+        if self.error:
+            return f"font cache rebuild failed: {self.error}"
+        return (
+            f"font cache rebuilt in {self.elapsed:.1f} s, parsed {self.parsed},"
+            f" reused {self.reused}, failed {self.failed}"
+        )
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            self._result = self._rebuild()
+        except Exception as e:
+            self.error = str(e)
+        self.elapsed = time.perf_counter() - start
+        self._finished.set()
+        return
+
+    def _rebuild(self) -> FontManager:
+        fonts = scan_font_paths()
+        self.total = len(fonts)
+
+        index = self._load_index()
+        stamps = {path: _file_stamp(path) for _, path in fonts}
+        # a file gone since the scan has no stamp, it is parsed and fails
+        stale = sorted(
+            {
+                path
+                for _, path in fonts
+                if path not in index
+                or index[path][0] is None
+                or stamps[path] is None
+                or tuple(index[path][0]) != stamps[path]
+            }
+        )
+        self.reused = self.total - len(stale)
+        self.done = self.reused
+
+        entries: dict[str, FontEntry | None] = {
+            path: index[path][1] for _, path in fonts if path not in stale
+        }
+        if stale:
+            chunks = [
+                stale[i : i + FONT_PARSE_CHUNK]
+                for i in range(0, len(stale), FONT_PARSE_CHUNK)
+            ]
+            with ProcessPoolExecutor(
+                max_workers=min(self.max_workers, len(chunks)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                futures = {
+                    executor.submit(_parse_font_files, chunk): chunk for chunk in chunks
+                }
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    entries.update(zip(chunk, future.result()))
+                    self.done += len(chunk)
+            self.parsed = len(stale)
+
+        fm = FontManager.__new__(FontManager)
+        fm.__dict__.update(font_manager.fontManager.__dict__)
+        fm.afmlist = []
+        fm.ttflist = []
+        for kind, path in fonts:
+            entry = entries[path]
+            if entry is None:
+                continue
+            (fm.afmlist if kind == "afm" else fm.ttflist).append(entry)
+        self.failed = sum(entry is None for entry in entries.values())
+
+        # the render processes and the next start of matplotlib read the new
+        # cache, replaced in one step so that they never read half of it
+        path = font_manager_path()
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            json_dump(fm, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self._save_index(
+            {
+                path: [stamps[path], entries[path]]
+                for _, path in fonts
+                if stamps[path] is not None
+            }
+        )
+        return fm
+
+    def _load_index(self) -> dict[str, list[Any]]:
+        """Entries of every font file by path, with the file stamp they stand for."""
+        try:
+            data = json.loads((get_cache_folder() / "font_index.json").read_text())
+            if data["version"] != FontManager.__version__:
+                raise ValueError("stale index")
+            return {
+                path: [stamp, None if entry is None else FontEntry(**entry)]
+                for path, (stamp, entry) in data["files"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        # no index yet, trust the files older than matplotlib's font cache
+        try:
+            cache_mtime = font_manager_path().stat().st_mtime_ns
+        except OSError:
+            return {}
+        fm = font_manager.fontManager
+        index: dict[str, list[Any]] = {}
+        for entry in [*fm.afmlist, *fm.ttflist]:
+            stamp = _file_stamp(entry.fname)
+            if stamp is not None and stamp[0] < cache_mtime:
+                index[entry.fname] = [stamp, entry]
+        return index
+
+    def _save_index(self, files: dict[str, list[Any]]) -> None:
+        data = {
+            "version": FontManager.__version__,
+            "files": {
+                path: [stamp, None if entry is None else dataclasses.asdict(entry)]
+                for path, (stamp, entry) in files.items()
+            },
+        }
+        path = get_cache_folder() / "font_index.json"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            warnings.warn(f"Failed to save the font index: {e}", UserWarning)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return
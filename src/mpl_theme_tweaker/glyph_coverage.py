@@ -0,0 +1,226 @@
+"""GlyphCoverage
+
+Functionality:
+    - Index the Unicode coverage of every font file of the font cache, as
+      sorted codepoint ranges, built once on a background thread and kept
+      in a cache file keyed like the font catalog.
+    - Pick the fallback fonts for a text, the fewest fonts covering the
+      characters its primary fonts miss, and remember the choice per text
+      and primary font files.
+    - Tell whether a font can render a string, for the font picker filter.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+from matplotlib import font_manager
+from matplotlib.font_manager import FontProperties
+from matplotlib.ft2font import FT2Font
+
+from mpl_theme_tweaker.cache_folder import get_cache_folder
+from mpl_theme_tweaker.font_catalog import font_catalog_key
+
+
+def codepoint_ranges(codepoints: list[int]) -> np.ndarray:
+    """Sorted inclusive (start, end) rows of the runs in `codepoints`."""
+    cps = np.unique(np.asarray(codepoints, dtype=np.uint32))
+    if cps.size == 0:
+        return np.zeros((0, 2), dtype=np.uint32)
+    breaks = np.flatnonzero(np.diff(cps) != 1)
+    starts = np.concatenate([cps[:1], cps[breaks + 1]])
+    ends = np.concatenate([cps[breaks], cps[-1:]])
+    return np.stack([starts, ends], axis=1)
+
+
+def ranges_cover(ranges: np.ndarray, codepoints: np.ndarray) -> np.ndarray:
+    """Whether each of `codepoints` falls in one of `ranges`."""
+    if ranges.size == 0:
+        return np.zeros(codepoints.shape, dtype=bool)
+    i = np.searchsorted(ranges[:, 0], codepoints, side="right") - 1
+    return (i >= 0) & (codepoints <= ranges[np.maximum(i, 0), 1])
+
+
+def text_codepoints(text: str) -> np.ndarray:
+    # whitespace and control characters never need a glyph
+    return np.array(
+        sorted({ord(c) for c in text if c.isprintable() and not c.isspace()}),
+        dtype=np.uint32,
+    )
+
+
+class GlyphCoverage:
+    """Codepoint ranges of every font file, `ranges` is None until loaded."""
+
+    def __init__(self):
+        self.ranges: dict[str, np.ndarray] | None = None
+        # family name of every indexed file
+        self.names: dict[str, str] = {}
+        # bumped whenever the index is replaced, the preview renders again
+        self.version: int = 0
+
+        # (text, primary font files) -> fallback font names
+        self._fallbacks: dict[tuple[str, tuple[str, ...]], list[str]] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        # mtime of the cache file last read without building, see `_load`
+        self._cache_mtime: int | None = None
+
+    def is_ready(self) -> bool:
+        return self.ranges is not None
+
+    def load_async(self) -> None:
+        """Load or build the index on a background thread."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._load, args=(True,), name="GlyphCoverage", daemon=True
+            )
+            self._thread.start()
+        return
+
+    def covers(self, path: str, text: str) -> bool:
+        """Whether the font file `path` has a glyph for every character of `text`."""
+        if self.ranges is None or path not in self.ranges:
+            return False
+        return bool(ranges_cover(self.ranges[path], text_codepoints(text)).all())
+
+    def fallback_families(self, text: str, family: list[str]) -> list[str]:
+        """Font names to append to `family`, so that `text` has every glyph.
+
+        Only reads the cache file when the index isn't loaded yet, e.g. in a
+        render process, and returns [] until there is one.
+        """
+        if self.ranges is None:
+            self._load(build=False)
+            if self.ranges is None:
+                return []
+
+        # the files `family` resolves to, they follow the font.* lists
+        paths = tuple(
+            font_manager.fontManager._find_fonts_by_props(  # type: ignore
+                FontProperties(family=family)
+            )
+        )
+        key = (text, paths)
+        fallbacks = self._fallbacks.get(key)
+        if fallbacks is None:
+            fallbacks = self._pick_fallbacks(text, paths)
+            self._fallbacks[key] = fallbacks
+        return fallbacks
+
+    def _pick_fallbacks(self, text: str, paths: tuple[str, ...]) -> list[str]:
+        ranges = self.ranges or {}
+        missing = text_codepoints(text)
+        for path in paths:
+            if path in ranges:
+                missing = missing[~ranges_cover(ranges[path], missing)]
+
+        # greedy cover, the font with the most missing glyphs first
+        fallbacks: list[str] = []
+        while missing.size:
+            best, best_covered = None, np.zeros(missing.shape, dtype=bool)
+            for path, font_ranges in ranges.items():
+                covered = ranges_cover(font_ranges, missing)
+                if covered.sum() > best_covered.sum():
+                    best, best_covered = path, covered
+            if best is None:
+                break
+            if self.names[best] not in fallbacks:
+                fallbacks.append(self.names[best])
+            missing = missing[~best_covered]
+        return fallbacks
+
+    def _load(self, build: bool) -> None:
+        key = font_catalog_key()
+        path = get_cache_folder() / "glyph_coverage.npz"
+        if not build:
+            # read again only once the file was written since the last try
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                return
+            if mtime == self._cache_mtime:
+                return
+            self._cache_mtime = mtime
+
+        try:
+            with np.load(path) as data:
+                if str(data["key"]) == key:
+                    self._set(
+                        [str(p) for p in data["paths"]],
+                        [str(n) for n in data["names"]],
+                        data["ranges"],
+                        data["offsets"],
+                    )
+                    return
+        except (OSError, ValueError, KeyError):
+            pass
+        if not build:
+            return
+
+        # one face per file, the regular one comes first in the font cache
+        files: dict[str, str] = {}
+        for entry in font_manager.fontManager.ttflist:
+            files.setdefault(entry.fname, entry.name)
+
+        paths, names, chunks = [], [], []
+        for fname, name in files.items():
+            try:
+                charmap = FT2Font(fname).get_charmap()
+            except Exception:
+                continue
+            paths.append(fname)
+            names.append(name)
+            chunks.append(codepoint_ranges(list(charmap)))
+
+        offsets = np.cumsum([0] + [len(chunk) for chunk in chunks])
+        ranges = np.concatenate(chunks) if chunks else np.zeros((0, 2), dtype=np.uint32)
+        self._set(paths, names, ranges, offsets)
+        self._save(path, key, paths, names, ranges, offsets)
+        return
+
+    def _set(
+        self,
+        paths: list[str],
+        names: list[str],
+        ranges: np.ndarray,
+        offsets: np.ndarray,
+    ) -> None:
+        self.names = dict(zip(paths, names))
+        self._fallbacks = {}
+        self.ranges = {
+            path: ranges[offsets[i] : offsets[i + 1]] for i, path in enumerate(paths)
+        }
+        self.version += 1
+        return
+
+    def _save(
+        self,
+        path: Path,
+        key: str,
+        paths: list[str],
+        names: list[str],
+        ranges: np.ndarray,
+        offsets: np.ndarray,
+    ) -> None:
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        try:
+            np.savez(
+                tmp_path,
+                key=np.array(key),
+                paths=np.array(paths),
+                names=np.array(names),
+                ranges=ranges,
+                offsets=offsets,
+            )
+            tmp_path.replace(path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+        return
+
+
+# Unicode coverage of the system fonts, shared by the renderers and the GUI
+glyph_coverage = GlyphCoverage()
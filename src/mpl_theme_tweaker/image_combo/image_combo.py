@@ -7,7 +7,7 @@ from typing import Any
 
 from imgui_bundle import imgui
 
-from mpl_theme_tweaker.opengl import create_texture_from_image
+from mpl_theme_tweaker.atlas import TextureAtlas
 
 
 def load_images(img_paths: list[Path] | str) -> list[Image.Image]:
@@ -25,26 +25,32 @@ def load_images(img_paths: list[Path] | str) -> list[Image.Image]:
 
 @dataclass
 class ImageComboOption:
-    image: Image.Image
+    # None if the image is given by the atlas of the combo
+    image: Image.Image | None
     label: str
     value: Any
 
 
 class ImageCombo:
-    # texture_ids: list[imgui.ImTextureID]
-    texture_refs: list[imgui.ImTextureRef]
+    """Combo of labeled images, all drawn from a single atlas texture."""
 
     def __init__(
         self,
         options: list[ImageComboOption],
         preview_label: str = "",
         preview_value: Any | None = None,
+        atlas: TextureAtlas | None = None,
     ) -> None:
         self.options = options
         self.values = [option.value for option in options]
         self.labels = [option.label for option in options]
         self.images = [option.image for option in options]
 
+        # region i of the atlas is the image of option i, packed from the
+        # option images on first use if not given
+        assert atlas is None or len(atlas) == len(options)
+        self.atlas = atlas
+
         self.preview_label = preview_label
         self.preview_value = preview_value
 
@@ -67,6 +73,14 @@ class ImageCombo:
 
         return cls(options, preview_label, preview_value)
 
+    def set_atlas(self, atlas: TextureAtlas) -> None:
+        """Draw the options from `atlas` from now on, call on the main thread."""
+        assert len(atlas) == len(self.options)
+        if self.atlas is not None and self.atlas is not atlas:
+            self.atlas.release()
+        self.atlas = atlas
+        return
+
     def set_index(self, index: int | None) -> None:
         self.index = index
         return
@@ -82,21 +96,15 @@ class ImageCombo:
         return self.labels[self.index]
 
     def gui(self, combo_label: str) -> bool:
-        if not hasattr(self, "texture_refs"):
-            self.texture_refs = []
-            for image in self.images:
-                texture_id = create_texture_from_image(image)
-                texture_ref = imgui.ImTextureRef(texture_id)
-                self.texture_refs.append(texture_ref)
+        if self.atlas is None:
+            self.atlas = TextureAtlas.from_images(self.images)  # type: ignore
 
         state_changed = False
         if imgui.begin_combo(combo_label, self.get_label()):
-            for i, (label, texture_ref) in enumerate(
-                zip(self.labels, self.texture_refs)
-            ):
+            for i, label in enumerate(self.labels):
                 changed, value = imgui.selectable(f"##{i:02d}", False)
                 imgui.same_line()
-                imgui.image(texture_ref, (32, 32))
+                self.atlas.image_gui(i, (32, 32))
                 imgui.same_line()
                 imgui.text(label)
 
@@ -1,13 +1,17 @@
 import json
+import multiprocessing
 
 import matplotlib.pyplot as plt
 from imgui_bundle import hello_imgui, imgui, immapp  # type: ignore
 
 from mpl_theme_tweaker.app_utils import setup_theme, set_window_icon, load_fonts
 from mpl_theme_tweaker.figure_window import FigureWindow
+from mpl_theme_tweaker.mpl_utils import ignore_font_warnings
 from mpl_theme_tweaker.params_window import ParamsWindow
 from mpl_theme_tweaker._global import assetsPath
 from mpl_theme_tweaker.style_manager import StyleManager
+from mpl_theme_tweaker.style_manager.style_cache import StyleSpec
+from mpl_theme_tweaker.texture_registry import registry
 
 
 class Application:
@@ -19,6 +23,8 @@ class Application:
         self.styles = [
             style for style in plt.style.available if not style.startswith("_")
         ]
+        # the state the style previews were warmed up for
+        self.warm_up_signature: tuple | None = None
 
         self.params = hello_imgui.RunnerParams()
         self._setup_app_window_params()
@@ -125,7 +131,8 @@ class Application:
     def _setup_callbacks(self) -> None:
         cb = self.params.callbacks
         cb.load_additional_fonts = load_fonts
-        cb.show_status = lambda: imgui.text("© 2025 pplotter.com. All rights reserved.")
+        cb.show_status = self.show_status
+        cb.pre_new_frame = self._pre_new_frame
         cb.show_menus = self.show_menu_gui
         cb.show_app_menu_items = self.params_window.gui_app_menu
         cb.post_init = self._init
@@ -147,29 +154,91 @@ class Application:
         self.params_window.load_app_settings(app_settings)
         return
 
+    def _pre_new_frame(self) -> None:
+        # free the textures of collected owners before the frame refers to any
+        registry.collect()
+        self.style_manager.poll()
+        self.warm_up_check()
+        return
+
+    def warm_up_check(self) -> None:
+        """Plan the style warm-up again once the preview shows a new state."""
+        preferences = self.params_window.preferences
+        figure_window = self.figure_window
+        if not preferences.warm_up_styles or not figure_window.frame_digest:
+            return
+        if not figure_window.is_idle():
+            return
+
+        reset = preferences.reset_default_before_apply_new
+        styles_map = self.style_manager.styles_map
+        signature = (
+            figure_window.frame_digest,
+            figure_window.backend_options,
+            reset,
+            id(styles_map),
+        )
+        if signature == self.warm_up_signature:
+            return
+        self.warm_up_signature = signature
+
+        # what each entry of the Style menu applies
+        targets: list[tuple[StyleSpec, ...]] = [("default",)]
+        for style in self.styles:
+            targets.append(("default", style) if reset else (style,))
+        for style_files in styles_map.values():
+            targets.extend((style_file,) for style_file in style_files)
+        figure_window.warm_up(targets)
+        return
+
     def _exit(self) -> None:
         app_settings = self.params_window.get_app_settings()
         app_settings_str = json.dumps(app_settings, indent=4)
         hello_imgui.save_user_pref("MplThemeTweakerSettings", app_settings_str)
+
+        self.params_window.shutdown()
+        self.figure_window.shutdown()
+        self.style_manager.shutdown()
+        registry.collect()
+        hello_imgui.log(
+            hello_imgui.LogLevel.info,
+            f"textures created {registry.created}, deleted {registry.deleted},"
+            f" leaked {registry.leaked}, evicted {registry.evicted}",
+        )
         return
 
     def run(self) -> None:
         immapp.run(self.params, self.addon_params)
         return
 
+    def show_status(self) -> None:
+        imgui.text("© 2025 pplotter.com. All rights reserved.")
+        self.params_window.gui_status()
+        self.figure_window.gui_status()
+        imgui.same_line()
+        imgui.text_disabled(registry.stats_text())
+        return
+
     def show_menu_gui(self) -> None:
         hello_imgui.show_app_menu(self.params)
         hello_imgui.show_view_menu(self.params)
 
         if imgui.begin_menu("Style"):
             if imgui.begin_menu("Official"):
+                thumbnails = self.style_manager.thumbnails
                 clicked, _ = imgui.menu_item("Default", "", False)
+                if imgui.is_item_hovered():
+                    thumbnails.tooltip("default")
                 if clicked:
+                    self.style_manager.applied_style = None
                     self.params_window.reset_by_default()
 
                 for style in self.styles:
                     clicked, _ = imgui.menu_item(style, "", False)
+                    if imgui.is_item_hovered():
+                        thumbnails.tooltip(style)
                     if clicked:
+                        self.style_manager.applied_style = None
                         self.params_window.reset_by_style(style)
                 imgui.end_menu()
 
@@ -179,6 +248,9 @@ class Application:
 
 
 def main():
+    # the process render pool spawns workers, needed by frozen executables
+    multiprocessing.freeze_support()
+    ignore_font_warnings()
     hello_imgui.set_assets_folder(assetsPath().as_posix())
 
     app = Application()
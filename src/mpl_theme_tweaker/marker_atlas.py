@@ -0,0 +1,163 @@
+"""MarkerAtlas
+
+Functionality:
+    - Rasterize the markers of the marker picker with the live marker size,
+      edge width and colors, all in one figure and one draw, the drawn grid
+      is the atlas.
+    - Render on a background thread when the relevant rc values changed, the
+      previous atlas stays on display meanwhile.
+    - Cache the atlases on disk by the hash of the relevant rc values.
+"""
+
+import hashlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from imgui_bundle import hello_imgui  # type: ignore
+import matplotlib as mpl
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.transforms import Bbox, IdentityTransform
+from PIL import Image
+
+from mpl_theme_tweaker.atlas import AtlasRegion, TextureAtlas
+
+MARKER_RC_KEYS = (
+    "lines.markersize",
+    "lines.markeredgewidth",
+    "lines.markerfacecolor",
+    "lines.markeredgecolor",
+    "lines.color",
+    # plotted lines take their color from the cycle, not lines.color
+    "axes.prop_cycle",
+)
+
+# pixel size of every marker cell, the default marker size fills half of it
+ICON_SIZE = 64
+ICON_COLUMNS = 8
+# on-disk atlases kept, switching back to a recent style loads instead of draws
+MARKER_ATLAS_KEEP = 16
+
+
+def marker_rc() -> dict[str, Any]:
+    """The rc values the marker icons depend on, read on the main thread."""
+    return {key: mpl.rcParams[key] for key in MARKER_RC_KEYS}
+
+
+def marker_rc_key(markers: list[str], rc: dict[str, Any]) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr((ICON_SIZE, markers, sorted(rc.items()))).encode())
+    return h.hexdigest()
+
+
+def render_marker_atlas(markers: list[str], rc: dict[str, Any]) -> TextureAtlas:
+    """Draw `markers` with the rc values `rc` into a grid of icons."""
+    columns = min(ICON_COLUMNS, max(1, len(markers)))
+    rows = max(1, -(-len(markers) // columns))
+    width, height = columns * ICON_SIZE, rows * ICON_SIZE
+
+    # points to pixels, the default marker size fills half of a cell
+    dpi = 72 * ICON_SIZE / 2 / mpl.rcParamsDefault["lines.markersize"]
+    # half a pixel more, so that the Agg canvas rounds to the grid size
+    fig = Figure(figsize=((width + 0.5) / dpi, (height + 0.5) / dpi), dpi=dpi)
+    fig.patch.set_alpha(0.0)
+    FigureCanvasAgg(fig)
+
+    cycle = rc["axes.prop_cycle"].by_key()
+    color = cycle["color"][0] if "color" in cycle else rc["lines.color"]
+
+    regions = []
+    for i, marker in enumerate(markers):
+        row, col = divmod(i, columns)
+        x, y = col * ICON_SIZE, row * ICON_SIZE
+        regions.append(AtlasRegion(x, y, ICON_SIZE, ICON_SIZE))
+
+        # display coordinates start at the bottom, the image at the top
+        center = (x + ICON_SIZE / 2, height - y - ICON_SIZE / 2)
+        line = Line2D(
+            [center[0]],
+            [center[1]],
+            linestyle="none",
+            marker=marker,
+            color=color,
+            markersize=rc["lines.markersize"],
+            markeredgewidth=rc["lines.markeredgewidth"],
+            markerfacecolor=rc["lines.markerfacecolor"],
+            markeredgecolor=rc["lines.markeredgecolor"],
+            transform=IdentityTransform(),
+        )
+        # a transparent border, big markers don't bleed into their neighbours
+        line.set_clip_box(
+            Bbox.from_bounds(
+                x + 1, height - y - ICON_SIZE + 1, ICON_SIZE - 2, ICON_SIZE - 2
+            )
+        )
+        fig.add_artist(line)
+
+    fig.canvas.draw()
+    image = np.asarray(fig.canvas.buffer_rgba())  # type: ignore
+    return TextureAtlas(Image.fromarray(image[:height, :width]), regions)
+
+
+class MarkerAtlas:
+    """The marker icons for the live rcParams, redrawn when those change.
+
+    Call `update` once per frame on the main thread, `atlas` is None until the
+    first atlas is ready.
+    """
+
+    def __init__(self, markers: list[str]):
+        self.markers = markers
+        self.atlas: TextureAtlas | None = None
+
+        self._key: str = ""
+        self._job_key: str = ""
+        self._job: Future | None = None
+        self._closed: bool = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="MarkerAtlas"
+        )
+
+    def update(self) -> bool:
+        """Collect a finished atlas and start a new one if rc changed.
+
+        Return whether `atlas` was replaced.
+        """
+        replaced = False
+        if self._closed:
+            return replaced
+        if self._job is not None and self._job.done():
+            job, self._job = self._job, None
+            try:
+                self.atlas = job.result()
+                self._key = self._job_key
+                replaced = True
+            except Exception as e:
+                # keep the last atlas, and don't retry the same rc values
+                self._key = self._job_key
+                hello_imgui.log(
+                    hello_imgui.LogLevel.warning, f"failed to draw marker icons: {e}"
+                )
+
+        if self._job is None:
+            rc = marker_rc()
+            key = marker_rc_key(self.markers, rc)
+            if key != self._key:
+                self._job_key = key
+                self._job = self._executor.submit(
+                    TextureAtlas.cached,
+                    "marker-rc",
+                    key,
+                    lambda: render_marker_atlas(self.markers, rc),
+                    MARKER_ATLAS_KEEP,
+                )
+        return replaced
+
+    def shutdown(self) -> None:
+        """Stop the drawing thread, a running draw is dropped."""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._job = None
+        return
@@ -6,7 +6,10 @@ import matplotlib.pyplot as plt
 from imgui_bundle import hello_imgui, imgui, imgui_toggle  # type: ignore
 
 from mpl_theme_tweaker._global import assetsPath, get_app_key
-from mpl_theme_tweaker.image_combo import ImageCombo, ImageComboOption, load_images
+from mpl_theme_tweaker.atlas import TextureAtlas
+from mpl_theme_tweaker.colormap_atlas import colormap_atlas, colormap_names
+from mpl_theme_tweaker.image_combo import ImageCombo, ImageComboOption
+from mpl_theme_tweaker.marker_atlas import MarkerAtlas
 
 
 class Entry(ABC):
@@ -44,6 +47,10 @@ class Entry(ABC):
         self.value = plt.rcParams[self.key]
         return
 
+    def shutdown(self) -> None:
+        """Stop the background work of the entry, on exit."""
+        return
+
     def __repr__(self) -> str:
         return f"{self.label}: {self.value}"
 
@@ -294,6 +301,59 @@ class StrEntry(Entry):
         return f'{self.key}: "{self.items[self.value]}"'
 
 
+class ColormapEntry(Entry):
+    """Every registered colormap, each shown with its gradient."""
+
+    def __init__(self, label: str, key: str):
+        super().__init__(label, key)
+        self.value: str = "viridis"
+        self.items: list[str] = colormap_names()
+        # packed on the first opening of the combo
+        self.atlas: TextureAtlas | None = None
+
+    def gui(self) -> None:
+        super().gui()
+
+        flags = imgui.ComboFlags_.height_large.value
+        if not imgui.begin_combo(self.label, self.value, flags):
+            return
+        if self.atlas is None:
+            self.atlas = colormap_atlas(self.items)
+
+        row_height = imgui.get_text_line_height_with_spacing()
+        if imgui.is_window_appearing() and self.value in self.items:
+            imgui.set_scroll_y(self.items.index(self.value) * row_height)
+
+        # only the visible rows are submitted
+        clipper = imgui.ListClipper()
+        clipper.begin(len(self.items), row_height)
+        while clipper.step():
+            for i in range(clipper.display_start, clipper.display_end):
+                name = self.items[i]
+                changed, _ = imgui.selectable(f"##{name}", name == self.value)
+                imgui.same_line()
+                # sample the middle of the 1 pixel row, no bleed from neighbours
+                (u0, _), (u1, _) = self.atlas.uv(i)
+                v = (i + 0.5) / len(self.items)
+                imgui.image(
+                    self.atlas.texture_ref,
+                    (6 * imgui.get_text_line_height(), imgui.get_text_line_height()),
+                    (u0, v),
+                    (u1, v),
+                )
+                imgui.same_line()
+                imgui.text(name)
+
+                if changed and name != self.value:
+                    self.update_mpl_rcparams(name)
+        clipper.end()
+        imgui.end_combo()
+        return
+
+    def to_str(self) -> str:
+        return f'{self.key}: "{self.value}"'
+
+
 class MarkerStyleEntry(Entry):
     """
     dict info should like:
@@ -341,17 +401,26 @@ class MarkerStyleEntry(Entry):
         marker_labels = [f"{key} ('{value}')" for key, value in marker.items()]
         marker_img_paths = [marker_dir / f"{name}.png" for name in marker_names]
 
-        marker_images = load_images(marker_img_paths)
+        # the images are only opened when the packed atlas isn't cached yet,
+        # they are shown until the icons for the live rc values are drawn
+        marker_atlas = TextureAtlas.from_files("marker", marker_img_paths)
         marker_options = [
-            ImageComboOption(img, label, value)
-            for img, label, value in zip(marker_images, marker_labels, marker_values)
+            ImageComboOption(None, label, value)
+            for label, value in zip(marker_labels, marker_values)
         ]
 
-        self.image_combo = ImageCombo(marker_options)
+        self.image_combo = ImageCombo(marker_options, atlas=marker_atlas)
+        self.marker_atlas = MarkerAtlas(marker_values)
+
+    def shutdown(self) -> None:
+        self.marker_atlas.shutdown()
+        return
 
     def gui(self) -> None:
         super().gui()
 
+        if self.marker_atlas.update():
+            self.image_combo.set_atlas(self.marker_atlas.atlas)  # type: ignore
         state_changed = self.image_combo.gui("Marker")
         if state_changed:
             new_value = self.image_combo.get_value()
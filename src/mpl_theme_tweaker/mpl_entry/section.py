@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
+from typing import Any
+
+import matplotlib.pyplot as plt
 
 from mpl_theme_tweaker.mpl_entry.mpl_entry import (
     BoolEntry,
     ColorEntry,
+    ColormapEntry,
     Entry,
     FloatEntry,
     Float2Entry,
@@ -32,6 +36,9 @@ class Section(ABC):
         need_update = [entry.need_update() for entry in self.entries]
         return any(need_update)
 
+    def updated_keys(self) -> list[str]:
+        return [entry.key for entry in self.entries if entry.need_update()]
+
     def update(self) -> None:
         for entry in self.entries:
             entry.update()
@@ -46,6 +53,19 @@ class Section(ABC):
             entry.reset_by_rcParams()
         return
 
+    def shutdown(self) -> None:
+        for entry in self.entries:
+            entry.shutdown()
+        return
+
+    def get_keys(self) -> list[str]:
+        return [entry.key for entry in self.entries if entry.key]
+
+    def rc_dict(self) -> dict[str, Any]:
+        return {
+            entry.key: plt.rcParams[entry.key] for entry in self.entries if entry.key
+        }
+
     def to_str(self) -> str:
         header = f"## {'*' * 71}\n## * {self.get_name():<68}*\n## {'*' * 71}\n"
         body: list[str] = []
@@ -1035,26 +1055,7 @@ class ImageSection(Section):
                 ],
             },
         )
-        cmap = StrEntry(
-            "colormap",
-            "image.cmap",
-            {
-                "value": 0,
-                "items": [
-                    "viridis",
-                    "hot",
-                    "cool",
-                    "coolwarm",
-                    "binary",
-                    "plasma",
-                    "inferno",
-                    "magma",
-                    "cividis",
-                    "jet",
-                    "rainbow",
-                ],
-            },
-        )
+        cmap = ColormapEntry("colormap", "image.cmap")
         lut = IntEntry(
             "lut",
             "image.lut",
@@ -1,34 +1,45 @@
-import contextlib
 import io
-import sys
 import warnings
 from PIL import Image
 
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
 
 
-@contextlib.contextmanager
-def suppress_stderr():
-    original_stderr = sys.stderr
-    sys.stderr = open("nul", "w")  # Linux/macOS '/dev/nul', Windows 'nul'
-    try:
-        yield
-    finally:
-        sys.stderr.close()
-        sys.stderr = original_stderr
+def ignore_font_warnings() -> None:
+    """Ignore the missing glyph warnings, call once per process at startup.
+
+    The figures and the font samples are drawn on other threads, where
+    swapping the process-wide filters or sys.stderr per draw isn't safe.
+    """
+    warnings.filterwarnings(
+        "ignore", category=UserWarning, message="Glyph .* missing from font"
+    )
+    return
 
 
 def Figure2Image(fig: Figure) -> Image.Image:
+    """Encode the figure as PNG, only used for exporting."""
     buf = io.BytesIO()
-    with warnings.catch_warnings():
-        warnings.filterwarnings(
-            "ignore", category=UserWarning, message=".*missing from font.*"
-        )
-
-        # Suppress the stderr output of font-related errors
-        with suppress_stderr():
-            fig.savefig(buf, format="png")
+    fig.savefig(buf, format="png")
 
     buf.seek(0)
     img = Image.open(buf)
     return img
+
+
+def Figure2RGBA(fig: Figure) -> np.ndarray:
+    """Draw the figure on an Agg canvas and return its RGBA buffer.
+
+    The returned array is a (height, width, 4) uint8 view of the renderer
+    memory, no PNG encoding or extra copy is involved, so it can be handed
+    to the texture upload directly.
+    """
+    canvas = fig.canvas
+    if type(canvas) is not FigureCanvasAgg:
+        canvas = FigureCanvasAgg(fig)
+
+    canvas.draw()
+
+    return np.asarray(canvas.buffer_rgba())
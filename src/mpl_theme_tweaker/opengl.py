@@ -1,19 +1,40 @@
+import ctypes
+
+import numpy as np
 from PIL.Image import Image
 from OpenGL.GL import (
+    glBindBuffer,
     glBindTexture,
+    glBufferData,
+    glClientWaitSync,
+    glDeleteSync,
+    glFenceSync,
+    glGenBuffers,
     glGenTextures,
+    glMapBufferRange,
     glTexImage2D,
     glTexParameteri,
+    glTexSubImage2D,
+    glUnmapBuffer,
+    GL_MAP_INVALIDATE_BUFFER_BIT,
+    GL_MAP_WRITE_BIT,
+    GL_PIXEL_UNPACK_BUFFER,
+    GL_STREAM_DRAW,
+    GL_SYNC_FLUSH_COMMANDS_BIT,
+    GL_SYNC_GPU_COMMANDS_COMPLETE,
     GL_TEXTURE_2D,
     GL_TEXTURE_MAG_FILTER,
     GL_TEXTURE_MIN_FILTER,
+    GL_TIMEOUT_EXPIRED,
     GL_LINEAR,
     GL_RGBA,
     GL_UNSIGNED_BYTE,
 )
 
+from mpl_theme_tweaker.texture_registry import registry
+
 
-def create_texture(width: int, height: int, data: bytes) -> int:
+def create_texture(width: int, height: int, data: bytes | np.ndarray) -> int:
     texture_id = glGenTextures(1)
     glBindTexture(GL_TEXTURE_2D, texture_id)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
@@ -39,7 +60,15 @@ def create_texture_from_image(image: Image) -> int:
     return create_texture(width, height, data)
 
 
-def rebind_texture(texture_id: int, width: int, height: int, data: bytes) -> None:
+def create_texture_from_array(array: np.ndarray) -> int:
+    """Create a texture from a (height, width, 4) uint8 RGBA array."""
+    height, width = array.shape[:2]
+    return create_texture(width, height, np.ascontiguousarray(array))
+
+
+def rebind_texture(
+    texture_id: int, width: int, height: int, data: bytes | np.ndarray
+) -> None:
     glBindTexture(GL_TEXTURE_2D, texture_id)
     glTexImage2D(
         GL_TEXTURE_2D,
@@ -61,3 +90,236 @@ def rebind_texture_from_image(texture_id: int, image: Image) -> None:
     data = image.tobytes()
     rebind_texture(texture_id, width, height, data)
     return
+
+
+def rebind_texture_from_array(texture_id: int, array: np.ndarray) -> None:
+    height, width = array.shape[:2]
+    rebind_texture(texture_id, width, height, np.ascontiguousarray(array))
+    return
+
+
+# rows apart by less than this are uploaded in one region, every region costs
+# a call and a copy
+DIRTY_ROW_GAP = 16
+MAX_DIRTY_RECTS = 8
+
+
+def find_dirty_rects(
+    old: np.ndarray, new: np.ndarray
+) -> list[tuple[int, int, int, int]]:
+    """Bounding boxes (x, y, width, height) of the pixels that differ.
+
+    The changed rows are grouped into bands, each band is narrowed to its
+    changed columns. Both arrays are (height, width, 4) uint8 of one size.
+    """
+    # compare whole pixels at once
+    old_px = np.ascontiguousarray(old).view(np.uint32)[..., 0]
+    new_px = np.ascontiguousarray(new).view(np.uint32)[..., 0]
+    diff = old_px != new_px
+
+    rows = np.flatnonzero(diff.any(axis=1))
+    if rows.size == 0:
+        return []
+
+    # split the changed rows where the gap is large enough, and merge the
+    # closest bands if there are too many
+    gaps = np.diff(rows)
+    splits = np.flatnonzero(gaps > DIRTY_ROW_GAP)
+    if splits.size >= MAX_DIRTY_RECTS:
+        widest = np.sort(np.argsort(gaps[splits])[-(MAX_DIRTY_RECTS - 1) :])
+        splits = splits[widest]
+
+    rects = []
+    starts = np.concatenate(([rows[0]], rows[splits + 1]))
+    ends = np.concatenate((rows[splits], [rows[-1]])) + 1
+    for y0, y1 in zip(starts, ends):
+        cols = np.flatnonzero(diff[y0:y1].any(axis=0))
+        x0, x1 = cols[0], cols[-1] + 1
+        rects.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+    return rects
+
+
+def update_texture_rects(
+    texture_id: int, array: np.ndarray, rects: list[tuple[int, int, int, int]]
+) -> int:
+    """Upload the `rects` of `array` into the texture, return the bytes sent."""
+    nbytes = 0
+    glBindTexture(GL_TEXTURE_2D, texture_id)
+    for x, y, width, height in rects:
+        data = np.ascontiguousarray(array[y : y + height, x : x + width])
+        glTexSubImage2D(
+            GL_TEXTURE_2D, 0, x, y, width, height, GL_RGBA, GL_UNSIGNED_BYTE, data
+        )
+        nbytes += data.nbytes
+    glBindTexture(GL_TEXTURE_2D, 0)
+    return nbytes
+
+
+def update_texture_from_array(
+    texture_id: int, old: np.ndarray | None, new: np.ndarray
+) -> int:
+    """Update a texture holding `old` to `new`, return the bytes uploaded.
+
+    Only the changed regions are uploaded, the texture storage is specified
+    again only when the size changed.
+    """
+    if old is None or old.shape != new.shape:
+        rebind_texture_from_array(texture_id, new)
+        return new.nbytes
+    return update_texture_rects(texture_id, new, find_dirty_rects(old, new))
+
+
+class StreamingTexture:
+    """Two RGBA textures in ping-pong, for frames replacing each other.
+
+    A new frame is uploaded into the back texture while the front one stays
+    on display, `poll` swaps them once the upload completed. The upload goes
+    through a pixel buffer object and a fence when the context has them
+    (OpenGL 3.2), else through plain glTexSubImage2D calls and the textures
+    swap right away. Every texture keeps the frame it holds, so only the
+    regions which differ from it are uploaded.
+    """
+
+    def __init__(self, label: str = "frame"):
+        # owner label of the textures in the texture registry
+        self.label = label
+        self._ids: list[int | None] = [None, None]
+        self._frames: list[np.ndarray | None] = [None, None]
+        self._front: int = 0
+        self._pbo: int | None = None
+        self._fence = None
+        # whether to stream through a buffer, decided once a context exists
+        self.use_pbo: bool | None = None
+
+    @property
+    def texture_id(self) -> int | None:
+        """The texture on display, None before the first upload."""
+        return self._ids[self._front]
+
+    def is_uploading(self) -> bool:
+        return self._fence is not None
+
+    def upload(self, frame: np.ndarray) -> int:
+        """Start uploading `frame`, return the number of bytes sent."""
+        if self.texture_id is None:
+            # nothing on display yet, no reason to wait
+            self._ids[self._front] = create_texture_from_array(frame)
+            self._frames[self._front] = frame
+            registry.register(
+                self._ids[self._front], self, self.label, frame.shape[1], frame.shape[0]
+            )
+            return frame.nbytes
+
+        if self.use_pbo is None:
+            # PyOpenGL entry points are falsy when the driver lacks them
+            self.use_pbo = bool(glMapBufferRange) and bool(glFenceSync)
+
+        back = 1 - self._front
+        old = self._frames[back]
+        if self._ids[back] is None or old is None or old.shape != frame.shape:
+            self._allocate(back, frame.shape[1], frame.shape[0])
+            height, width = frame.shape[:2]
+            rects = [(0, 0, width, height)]
+        else:
+            rects = find_dirty_rects(old, frame)
+        self._frames[back] = frame
+
+        if self.use_pbo and rects:
+            nbytes = self._upload_pbo(self._ids[back], frame, rects)  # type: ignore
+            self._set_fence(glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0))
+        else:
+            nbytes = update_texture_rects(self._ids[back], frame, rects)  # type: ignore
+            self._set_fence(None)
+            self._front = back
+        return nbytes
+
+    def poll(self) -> bool:
+        """Swap the textures if the upload completed, return whether it did."""
+        if self._fence is None:
+            return False
+        status = glClientWaitSync(self._fence, GL_SYNC_FLUSH_COMMANDS_BIT, 0)
+        if status == GL_TIMEOUT_EXPIRED:
+            return False
+        self._set_fence(None)
+        self._front = 1 - self._front
+        return True
+
+    def release(self) -> None:
+        self._set_fence(None)
+        for texture_id in self._ids:
+            if texture_id is not None:
+                registry.release(texture_id)
+        if self._pbo is not None:
+            registry.release(self._pbo, "buffer")
+        self._ids = [None, None]
+        self._frames = [None, None]
+        self._pbo = None
+        return
+
+    def _allocate(self, index: int, width: int, height: int) -> None:
+        if self._ids[index] is None:
+            self._ids[index] = create_texture(width, height, None)  # type: ignore
+            registry.register(self._ids[index], self, self.label, width, height)
+        else:
+            rebind_texture(self._ids[index], width, height, None)  # type: ignore
+            registry.resize(self._ids[index], width, height)  # type: ignore
+        return
+
+    def _set_fence(self, fence) -> None:
+        if self._fence is not None:
+            glDeleteSync(self._fence)
+        self._fence = fence
+        return
+
+    def _upload_pbo(
+        self, texture_id: int, frame: np.ndarray, rects: list[tuple[int, int, int, int]]
+    ) -> int:
+        nbytes = sum(width * height * 4 for _, _, width, height in rects)
+        if self._pbo is None:
+            self._pbo = glGenBuffers(1)
+            registry.register(
+                self._pbo, self, f"{self.label} buffer", 0, 1, "buffer", 1
+            )
+        registry.resize(self._pbo, nbytes, 1, "buffer")
+
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self._pbo)
+        # orphan the storage, the driver may still read the previous upload
+        glBufferData(GL_PIXEL_UNPACK_BUFFER, nbytes, None, GL_STREAM_DRAW)
+        address = glMapBufferRange(
+            GL_PIXEL_UNPACK_BUFFER,
+            0,
+            nbytes,
+            GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT,
+        )
+        mapped = np.ctypeslib.as_array((ctypes.c_ubyte * nbytes).from_address(address))
+        offsets = []
+        offset = 0
+        for x, y, width, height in rects:
+            size = width * height * 4
+            mapped[offset : offset + size].reshape(height, width, 4)[...] = frame[
+                y : y + height, x : x + width
+            ]
+            offsets.append(offset)
+            offset += size
+        del mapped
+        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+
+        # with a buffer bound, the data argument is an offset into it and the
+        # call returns without waiting for the copy
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        for (x, y, width, height), offset in zip(rects, offsets):
+            glTexSubImage2D(
+                GL_TEXTURE_2D,
+                0,
+                x,
+                y,
+                width,
+                height,
+                GL_RGBA,
+                GL_UNSIGNED_BYTE,
+                ctypes.c_void_p(offset),
+            )
+        glBindTexture(GL_TEXTURE_2D, 0)
+        # other texture uploads, e.g. the imgui font atlas, read client memory
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+        return nbytes
@@ -0,0 +1,348 @@
+"""Paint-only edits
+
+Functionality:
+    - Split the rc keys into paint-only keys, which only recolor artists of
+      the demo figure, and the keys which may change its geometry.
+    - Restyle the live artists of a kept figure for paint-only edits and draw
+      it again without running the layout engine.
+    - `LiveFigure` keeps the last figure of a plot function, and rebuilds it
+      whenever a geometry key changed.
+"""
+
+import itertools
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Literal
+
+import matplotlib as mpl
+import matplotlib.colors as mcolors
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.legend import Legend
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+from matplotlib.text import Text
+
+from mpl_theme_tweaker.figure import CYCLE_GID
+from mpl_theme_tweaker.mpl_utils import Figure2RGBA
+from mpl_theme_tweaker.rc_tracking import track_rc_reads
+
+# A painter recolors the artists styled by some rc keys with the live
+# rcParams, `old` is the rc dict the figure was drawn with. It returns False
+# if the edit can't be painted, the figure is rebuilt then.
+Painter = Callable[[Figure, dict[str, Any]], bool]
+
+
+_LABEL_COLOR_GETTERS = ("linecolor", "markerfacecolor", "mfc", "markeredgecolor", "mec")
+
+
+def _legends(fig: Figure) -> list[Legend]:
+    legends = [ax.get_legend() for ax in fig.axes]
+    return [legend for legend in legends if legend is not None] + fig.legends
+
+
+def _paint_figure_patch(fig: Figure, old: dict[str, Any]) -> bool:
+    fig.patch.set_facecolor(mpl.rcParams["figure.facecolor"])
+    fig.patch.set_edgecolor(mpl.rcParams["figure.edgecolor"])
+    return True
+
+
+def _paint_axes_patch(fig: Figure, old: dict[str, Any]) -> bool:
+    for ax in fig.axes:
+        ax.patch.set_facecolor(mpl.rcParams["axes.facecolor"])
+    return True
+
+
+def _paint_spines(fig: Figure, old: dict[str, Any]) -> bool:
+    for ax in fig.axes:
+        for spine in ax.spines.values():
+            spine.set_edgecolor(mpl.rcParams["axes.edgecolor"])
+    return True
+
+
+def _paint_legend_frames(fig: Figure, old: dict[str, Any]) -> bool:
+    facecolor = mpl.rcParams["legend.facecolor"]
+    if facecolor == "inherit":
+        facecolor = mpl.rcParams["axes.facecolor"]
+    edgecolor = mpl.rcParams["legend.edgecolor"]
+    if edgecolor == "inherit":
+        edgecolor = mpl.rcParams["axes.edgecolor"]
+
+    for legend in _legends(fig):
+        legend.get_frame().set_facecolor(facecolor)
+        legend.get_frame().set_edgecolor(edgecolor)
+    return True
+
+
+def _paint_axis_labels(fig: Figure, old: dict[str, Any]) -> bool:
+    for ax in fig.axes:
+        ax.xaxis.label.set_color(mpl.rcParams["axes.labelcolor"])
+        ax.yaxis.label.set_color(mpl.rcParams["axes.labelcolor"])
+    return True
+
+
+def _paint_titles(fig: Figure, old: dict[str, Any]) -> bool:
+    color = mpl.rcParams["axes.titlecolor"]
+    if color == "auto":
+        color = mpl.rcParams["text.color"]
+
+    for ax in fig.axes:
+        for title in (ax.title, ax._left_title, ax._right_title):
+            title.set_color(color)
+    return True
+
+
+def _paint_texts(fig: Figure, old: dict[str, Any]) -> bool:
+    """The texts without a color of their own: suptitle and annotations."""
+    color = mpl.rcParams["text.color"]
+    if fig._suptitle is not None:
+        fig._suptitle.set_color(color)
+    for ax in fig.axes:
+        for text in ax.texts:
+            text.set_color(color)
+    return True
+
+
+def _paint_legend_texts(fig: Figure, old: dict[str, Any]) -> bool:
+    labelcolor = mpl.rcParams["legend.labelcolor"]
+    if labelcolor is None or labelcolor == "None":
+        labelcolor = mpl.rcParams["text.color"]
+    if labelcolor in _LABEL_COLOR_GETTERS:
+        # the labels take the color of their handles
+        return False
+    colors = mcolors.to_rgba_array(labelcolor)
+
+    for legend in _legends(fig):
+        for text, color in zip(legend.get_texts(), itertools.cycle(colors)):
+            text.set_color(color)
+        legend.get_title().set_color(mpl.rcParams["text.color"])
+    return True
+
+
+def _paint_ticks(fig: Figure, old: dict[str, Any]) -> bool:
+    for ax in fig.axes:
+        for name, axis in (("xtick", ax.xaxis), ("ytick", ax.yaxis)):
+            color = mpl.rcParams[f"{name}.color"]
+            labelcolor = mpl.rcParams[f"{name}.labelcolor"]
+            if labelcolor == "inherit":
+                labelcolor = color
+            # also applies to the offset text, and to the ticks created later
+            axis.set_tick_params(which="both", color=color, labelcolor=labelcolor)
+    return True
+
+
+def _paint_grid(fig: Figure, old: dict[str, Any]) -> bool:
+    color = mpl.rcParams["grid.color"]
+    # the alpha of the color wins over grid.alpha, as in `Tick.__init__`
+    alpha = None
+    if not mcolors._has_alpha_channel(color):
+        alpha = mpl.rcParams["grid.alpha"]
+
+    for ax in fig.axes:
+        for axis in (ax.xaxis, ax.yaxis):
+            axis.set_tick_params(which="both", grid_color=color, grid_alpha=alpha)
+    return True
+
+
+def _paint_images(fig: Figure, old: dict[str, Any]) -> bool:
+    for ax in fig.axes:
+        for image in ax.images:
+            image.set_cmap(mpl.rcParams["image.cmap"])
+    return True
+
+
+def _cycle_colors(cycle) -> list[tuple[float, float, float]] | None:
+    keys = cycle.by_key()
+    if set(keys) != {"color"}:
+        return None
+    return [mcolors.to_rgb(color) for color in keys["color"]]
+
+
+def _recolor(color, mapping: dict[tuple, tuple]) -> tuple | None:
+    """`color` with its rgb replaced by `mapping`, None if it isn't mapped."""
+    if isinstance(color, str) and color.lower() in ("none", "auto"):
+        return None
+    rgba = mcolors.to_rgba(color)
+    rgb = mapping.get(rgba[:3])
+    if rgb is None or rgb == rgba[:3]:
+        return None
+    return (*rgb, rgba[3])
+
+
+def _follows_cycle(color, default_key: str) -> bool:
+    """Whether a patch color spec is a "CN" color, which follows the cycle."""
+    if color is None:
+        color = mpl.rcParams[default_key]
+    return bool(mcolors._is_nth_color(color))
+
+
+def _paint_prop_cycle(fig: Figure, old: dict[str, Any]) -> bool:
+    """Swap the colors of the artists colored from the color cycle."""
+    if "axes.prop_cycle" not in old:
+        return False
+    old_colors = _cycle_colors(old["axes.prop_cycle"])
+    new_colors = _cycle_colors(mpl.rcParams["axes.prop_cycle"])
+    # a new cycle length changes how many artists are plotted
+    if old_colors is None or new_colors is None:
+        return False
+    if len(old_colors) != len(new_colors) or len(set(old_colors)) != len(old_colors):
+        return False
+    mapping = dict(zip(old_colors, new_colors))
+
+    # artists which took a color of the cycle, see `figure._from_cycle`
+    artists = fig.findobj(lambda artist: artist.get_gid() == CYCLE_GID)
+    for legend in _legends(fig):
+        artists += legend.legend_handles
+    for artist in artists:
+        if isinstance(artist, Patch):
+            # the edge took the cycle color too only if it matches the face,
+            # leave it alone otherwise, the hatch may follow the edge
+            facecolor, edgecolor = artist.get_facecolor(), artist.get_edgecolor()
+            if (color := _recolor(facecolor, mapping)) is not None:
+                artist.set_facecolor(color)
+                if edgecolor[:3] == facecolor[:3]:
+                    artist.set_edgecolor((*color[:3], edgecolor[3]))
+        elif isinstance(artist, Line2D):
+            if (color := _recolor(artist.get_color(), mapping)) is not None:
+                artist.set_color(color)
+
+    # patches with a "CN" color, e.g. the default patch.facecolor, resolve it
+    # against the cycle when the color is set, lines and texts when drawn
+    patches = fig.findobj(Patch)
+    # the text boxes aren't children of their texts
+    patches += [text.get_bbox_patch() for text in fig.findobj(Text)]
+    for patch in filter(None, patches):
+        if _follows_cycle(patch._original_facecolor, "patch.facecolor"):
+            patch._set_facecolor(patch._original_facecolor)
+        if _follows_cycle(patch._original_edgecolor, "patch.edgecolor"):
+            patch._set_edgecolor(patch._original_edgecolor)
+    return True
+
+
+# rc key -> the painters of the artists it styles, every other key may change
+# the geometry of the figure
+PAINTERS: dict[str, list[Painter]] = {
+    "figure.facecolor": [_paint_figure_patch],
+    "figure.edgecolor": [_paint_figure_patch],
+    "axes.facecolor": [_paint_axes_patch, _paint_legend_frames],
+    "axes.edgecolor": [_paint_spines, _paint_legend_frames],
+    "axes.labelcolor": [_paint_axis_labels],
+    "axes.titlecolor": [_paint_titles],
+    "axes.prop_cycle": [_paint_prop_cycle],
+    "text.color": [_paint_texts, _paint_titles, _paint_legend_texts],
+    "xtick.color": [_paint_ticks],
+    "xtick.labelcolor": [_paint_ticks],
+    "ytick.color": [_paint_ticks],
+    "ytick.labelcolor": [_paint_ticks],
+    "grid.color": [_paint_grid],
+    "grid.alpha": [_paint_grid],
+    "legend.facecolor": [_paint_legend_frames],
+    "legend.edgecolor": [_paint_legend_frames],
+    "legend.labelcolor": [_paint_legend_texts],
+    "image.cmap": [_paint_images],
+}
+
+
+def is_paint_only(keys: set[str]) -> bool:
+    return all(key in PAINTERS for key in keys)
+
+
+def repaint(fig: Figure, old: dict[str, Any], keys: set[str]) -> bool:
+    """Restyle `fig` for the edited `keys`, False if it must be rebuilt."""
+    if not is_paint_only(keys):
+        return False
+
+    painters: list[Painter] = []
+    for key in sorted(keys):
+        painters += [p for p in PAINTERS[key] if p not in painters]
+    return all(painter(fig, old) for painter in painters)
+
+
+_MISSING = object()
+
+RenderKind = Literal["kept", "paint", "build"]
+
+
+class LiveFigure:
+    """The last figure of a plot function, kept alive to take paint edits.
+
+    Like the other renders, the figure is drawn with the live rcParams, the
+    rc dict passed to `render` is the snapshot they stand for.
+    """
+
+    def __init__(self):
+        self.figure: Figure | None = None
+        self.frame: np.ndarray | None = None
+        # what the figure was drawn with: rc snapshot, plot token, rc reads
+        self.rc: dict[str, Any] = {}
+        self.token: Hashable = None
+        self.reads: set[str] = set()
+
+    def changed_keys(
+        self, rc: dict[str, Any], token: Hashable = None
+    ) -> set[str] | None:
+        """The edited keys the figure depends on, None if it must be rebuilt."""
+        if self.figure is None or token != self.token:
+            return None
+        return {
+            key
+            for key in self.reads
+            if self.rc.get(key, _MISSING) != rc.get(key, _MISSING)
+        }
+
+    def render(
+        self,
+        build: Callable[[], Figure],
+        rc: dict[str, Any],
+        token: Hashable = None,
+    ) -> tuple[np.ndarray, RenderKind]:
+        """Render the state `rc`, rebuilding the figure with `build` if needed.
+
+        `token` stands for the inputs of `build` other than rcParams, e.g. a
+        size, the figure is rebuilt when it changes.
+        """
+        changed = self.changed_keys(rc, token)
+        with track_rc_reads() as reads:
+            if changed is not None and not changed:
+                kind: RenderKind = "kept"
+            elif changed and repaint(self.figure, self.rc, changed):  # type: ignore
+                kind = "paint"
+                self.frame = self._draw()
+            else:
+                kind = "build"
+                self.figure = build()
+                self.token = token
+                self.frame = self._draw()
+                # the layout is solved, paint-only redraws keep it as is
+                self.figure.set_layout_engine("none")
+
+        # matplotlib caches some lookups, keep what earlier renders read
+        self.reads |= reads
+        self.rc = rc
+        if any(mpl.rcParams._get(k) != rc[k] for k in self.reads if k in rc):
+            # rcParams were edited while drawing, the figure may mix two
+            # states, make sure the next render doesn't trust it
+            self.rc = {}
+        return self.frame, kind  # type: ignore
+
+    def _draw(self) -> np.ndarray:
+        # the canvas memory is reused by the next draw, hand out a copy
+        return np.array(Figure2RGBA(self.figure))  # type: ignore
+
+
+class LiveFigureSet:
+    """Kept figures by name and dpi.
+
+    The draft and the full resolution renders of the progressive preview each
+    keep their figures, only the `keep` most recently used dpis are kept.
+    """
+
+    def __init__(self, keep: int = 2):
+        self.keep = keep
+        self._figures: OrderedDict[float, dict[str, LiveFigure]] = OrderedDict()
+
+    def get(self, dpi: float, name: str = "") -> LiveFigure:
+        figures = self._figures.setdefault(dpi, {})
+        self._figures.move_to_end(dpi)
+        while len(self._figures) > self.keep:
+            self._figures.popitem(last=False)
+        return figures.setdefault(name, LiveFigure())
@@ -2,16 +2,18 @@ import os
 import platform
 from dataclasses import dataclass, field
 from pathlib import Path
-import threading
 from typing import Any, Callable, Literal
 
 from cycler import cycler
 from imgui_bundle import hello_imgui, icons_fontawesome_6, imgui, imgui_toggle  # type: ignore
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
-from matplotlib.font_manager import fontManager, _load_fontmanager  # type: ignore
 
 from mpl_theme_tweaker.app_utils import get_downloads_folder
+from mpl_theme_tweaker.font_catalog import font_catalog
+from mpl_theme_tweaker.font_picker import FontPicker
+from mpl_theme_tweaker.font_rebuild import FontCacheRebuild, install_font_manager
+from mpl_theme_tweaker.glyph_coverage import glyph_coverage
 from mpl_theme_tweaker.mpl_entry.section import (
     Section,
     AxesSection,
@@ -23,10 +25,12 @@ from mpl_theme_tweaker.mpl_entry.section import (
     LegendSection,
     LinesSection,
 )
+from mpl_theme_tweaker.scheduler import ReplotScheduler, is_dragging
+from mpl_theme_tweaker.style_manager.style_cache import style_cache
+from mpl_theme_tweaker.texture_registry import registry
 from mpl_theme_tweaker._global import get_app_key, set_app_key
 
 _TABLE_FLAGS = imgui.TableFlags_.borders + imgui.TableFlags_.resizable
-_FONT_NAMES = ["None"] + sorted(set(fontManager.get_font_names()))
 _TITLE_FONT_ = None
 
 
@@ -97,10 +101,6 @@ def _title(title: str) -> None:
     imgui.pop_font()
 
 
-def _recache_font() -> None:
-    _load_fontmanager(try_read_cache=False)
-
-
 @dataclass
 class Preferences:
     style_name: str = ""
@@ -110,6 +110,16 @@ class Preferences:
     target_directory: str = ""
     download_to_target: bool = False
     reset_default_before_apply_new: bool = False
+    render_backend: Literal["thread", "process"] = "thread"
+    render_processes: int = 2
+    incremental_tiles: bool = False
+    replot_delay_ms: int = 150
+    render_cache_mb: int = 256
+    progressive_preview: bool = True
+    refine_delay_ms: int = 500
+    texture_budget_mb: int = 256
+    warm_up_styles: bool = False
+    warm_up_cache_mb: int = 256
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -120,6 +130,16 @@ class Preferences:
             "target_directory": self.target_directory,
             "download_to_target": self.download_to_target,
             "reset_default_before_apply_new": self.reset_default_before_apply_new,
+            "render_backend": self.render_backend,
+            "render_processes": self.render_processes,
+            "incremental_tiles": self.incremental_tiles,
+            "replot_delay_ms": self.replot_delay_ms,
+            "render_cache_mb": self.render_cache_mb,
+            "progressive_preview": self.progressive_preview,
+            "refine_delay_ms": self.refine_delay_ms,
+            "texture_budget_mb": self.texture_budget_mb,
+            "warm_up_styles": self.warm_up_styles,
+            "warm_up_cache_mb": self.warm_up_cache_mb,
         }
 
     def from_dict(self, data: dict[str, Any]) -> None:
@@ -143,6 +163,40 @@ class Preferences:
             data.get("reset_default_before_apply_new", False)
         )
 
+        backend = data.get("render_backend", "thread")
+        if backend not in ["thread", "process"]:
+            backend = "thread"
+        self.render_backend = backend  # type: ignore
+        self.render_processes = max(1, int(data.get("render_processes", 2)))
+        self.incremental_tiles = bool(data.get("incremental_tiles", False))
+        self.replot_delay_ms = max(0, int(data.get("replot_delay_ms", 150)))
+        self.render_cache_mb = max(0, int(data.get("render_cache_mb", 256)))
+        self.progressive_preview = bool(data.get("progressive_preview", True))
+        self.refine_delay_ms = max(0, int(data.get("refine_delay_ms", 500)))
+        self.texture_budget_mb = max(16, int(data.get("texture_budget_mb", 256)))
+        self.warm_up_styles = bool(data.get("warm_up_styles", False))
+        self.warm_up_cache_mb = max(0, int(data.get("warm_up_cache_mb", 256)))
+
+        return
+
+    def apply_render_settings(self) -> None:
+        _func = get_app_key("FigureWindow.set_render_backend")
+        if _func is not None:
+            _func(self.render_backend, self.render_processes, self.incremental_tiles)
+
+        _func = get_app_key("FigureWindow.set_render_cache_size")
+        if _func is not None:
+            _func(self.render_cache_mb)
+
+        _func = get_app_key("FigureWindow.set_progressive")
+        if _func is not None:
+            _func(self.progressive_preview, self.refine_delay_ms)
+
+        _func = get_app_key("FigureWindow.set_warm_up")
+        if _func is not None:
+            _func(self.warm_up_styles, self.warm_up_cache_mb)
+
+        registry.set_budget(self.texture_budget_mb * 2**20)
         return
 
     def get_write_path(self) -> Path:
@@ -223,12 +277,92 @@ class Preferences:
             config=toggle_config,
         )
 
+        _title("Rendering")
+        settings_changed = False
+        if imgui.radio_button("Thread", self.render_backend == "thread"):
+            self.render_backend = "thread"
+            settings_changed = True
+        imgui.same_line()
+        if imgui.radio_button("Process pool", self.render_backend == "process"):
+            self.render_backend = "process"
+            settings_changed = True
+
+        changed, render_processes = imgui.input_int("Processes", self.render_processes)
+        if changed:
+            self.render_processes = max(1, min(render_processes, os.cpu_count() or 1))
+            settings_changed = True
+
+        changed, self.incremental_tiles = imgui_toggle.toggle(
+            "Incremental Panels", self.incremental_tiles, config=toggle_config
+        )
+        imgui.set_item_tooltip("Render each demo panel apart, only redraw stale ones.")
+        if changed:
+            settings_changed = True
+
+        changed, render_cache_mb = imgui.input_int(
+            "Render cache (MB)", self.render_cache_mb, 16, 128
+        )
+        if changed:
+            self.render_cache_mb = max(0, min(render_cache_mb, 8192))
+            settings_changed = True
+
+        changed, self.progressive_preview = imgui_toggle.toggle(
+            "Progressive Preview", self.progressive_preview, config=toggle_config
+        )
+        imgui.set_item_tooltip(
+            "Draft at the window resolution first, full dpi once the input is idle."
+        )
+        if changed:
+            settings_changed = True
+
+        changed, refine_delay_ms = imgui.input_int(
+            "Refine delay (ms)", self.refine_delay_ms, 50, 250
+        )
+        if changed:
+            self.refine_delay_ms = max(0, min(refine_delay_ms, 10000))
+            settings_changed = True
+
+        changed, texture_budget_mb = imgui.input_int(
+            "Texture budget (MB)", self.texture_budget_mb, 16, 128
+        )
+        imgui.set_item_tooltip(
+            "Icon textures beyond the budget are freed, oldest first."
+        )
+        if changed:
+            self.texture_budget_mb = max(16, min(texture_budget_mb, 8192))
+            settings_changed = True
+
+        changed, self.warm_up_styles = imgui_toggle.toggle(
+            "Warm Up Styles", self.warm_up_styles, config=toggle_config
+        )
+        imgui.set_item_tooltip(
+            "Render the styles of the Style menu ahead, at idle priority."
+        )
+        if changed:
+            settings_changed = True
+
+        changed, warm_up_cache_mb = imgui.input_int(
+            "Warm-up cache (MB)", self.warm_up_cache_mb, 16, 128
+        )
+        if changed:
+            self.warm_up_cache_mb = max(0, min(warm_up_cache_mb, 8192))
+            settings_changed = True
+
+        if settings_changed:
+            self.apply_render_settings()
+
+        changed, replot_delay_ms = imgui.input_int(
+            "Replot delay (ms)", self.replot_delay_ms, 10, 100
+        )
+        if changed:
+            self.replot_delay_ms = max(0, min(replot_delay_ms, 2000))
+        imgui.set_item_tooltip("Edits within the delay or a drag make one replot.")
+
         return
 
 
 @dataclass
 class _Font:
-    index: int = 0
     name: str = "None"
 
 
@@ -245,6 +379,11 @@ class _FontFamilyManager:
     )
     N: int = 5
     fonts: dict[str, list[_Font]] = field(init=False, default_factory=dict)
+    # created on first draw, it starts the sample thread
+    picker: FontPicker | None = field(init=False, default=None)
+    picker_version: int = field(init=False, default=0)
+    # reset_by_rcParams waits for the font catalog
+    reset_pending: bool = field(init=False, default=False)
 
     def __post_init__(self):
         for family in self.family_names:
@@ -255,12 +394,33 @@ class _FontFamilyManager:
         for family_name, fonts in self.fonts.items():
             font_family_name = f"font.{family_name}:"
             text = f"{font_family_name:<18} "
-            text += ", ".join([font.name for font in fonts if font.name != "None"])
+            if self.reset_pending:
+                # the table isn't filled yet, rcParams is what is applied
+                text += ", ".join(plt.rcParams[f"font.{family_name}"])
+            else:
+                text += ", ".join([font.name for font in fonts if font.name != "None"])
             texts.append(text)
 
         return "\n".join(texts)
 
+    def rc_dict(self) -> dict[str, Any]:
+        return {
+            f"font.{family_name}": plt.rcParams[f"font.{family_name}"]
+            for family_name in self.family_names
+        }
+
     def gui(self) -> None:
+        if not font_catalog.is_ready():
+            imgui.text_disabled(
+                f"{icons_fontawesome_6.ICON_FA_SPINNER} Loading system fonts..."
+            )
+            return
+        if self.picker is None or self.picker_version != font_catalog.version:
+            if self.picker is not None:
+                self.picker.close()
+            self.picker = FontPicker(font_catalog.names, font_catalog.files)  # type: ignore
+            self.picker_version = font_catalog.version
+
         if imgui.begin_table("Font", 5, _TABLE_FLAGS):
             imgui.table_headers_row()
 
@@ -278,12 +438,11 @@ class _FontFamilyManager:
                     current_font = self.fonts[family_name][i]
 
                     imgui.push_item_width(-1)
-                    changed, new_index = imgui.combo(
-                        f"##font_{i}_{j}", current_font.index, _FONT_NAMES
+                    changed, name = self.picker.gui(
+                        f"##font_{i}_{j}", current_font.name
                     )
                     if changed:
-                        current_font.index = new_index
-                        current_font.name = _FONT_NAMES[new_index]
+                        current_font.name = name
                     imgui.pop_item_width()
 
             imgui.end_table()
@@ -303,16 +462,31 @@ class _FontFamilyManager:
             replot_func()
         return
 
+    def close(self) -> None:
+        if self.picker is not None:
+            self.picker.close()
+            self.picker = None
+        return
+
+    def reset_check(self) -> None:
+        """Finish a reset which waited for the font catalog, once per frame."""
+        if self.reset_pending and font_catalog.is_ready():
+            self.reset_by_rcParams()
+        return
+
     def reset_by_rcParams(self) -> None:
+        if not font_catalog.is_ready():
+            self.reset_pending = True
+            return
+        self.reset_pending = False
+
         for family_name in self.family_names:
             font_names = plt.rcParams[f"font.{family_name}"]
             row = 0
             for _, font_name in enumerate(font_names):
                 if row >= self.N:
                     break
-                if font_name in _FONT_NAMES:
-                    index = _FONT_NAMES.index(font_name)
-                    self.fonts[family_name][row].index = index
+                if font_name in font_catalog.files:
                     self.fonts[family_name][row].name = font_name
                     row += 1
         return
@@ -328,6 +502,9 @@ class _ColorCycleManager:
         color_cycler = cycler(color=color_hex)
         return f"## Color Cycle\naxes.prop_cycle:{str(color_cycler)}"
 
+    def rc_dict(self) -> dict[str, Any]:
+        return {"axes.prop_cycle": plt.rcParams["axes.prop_cycle"]}
+
     def gui(self) -> None:
         if imgui.begin_table("Color", 2, _TABLE_FLAGS):
             imgui.table_headers_row()
@@ -385,7 +562,13 @@ class _ColorCycleManager:
 class ParamsWindow:
     def __init__(self, callback: Callable):
         self.callback: Callable = callback
+        self.scheduler = ReplotScheduler(callback, is_ignored=self._preview_ignores)
+        # the font table shows a placeholder until the fonts are listed
+        font_catalog.load_async()
+        glyph_coverage.load_async()
         self.font_family_manager = _FontFamilyManager()
+        # the last font cache rebuild, its result stays in the status bar
+        self.font_rebuild: FontCacheRebuild | None = None
         self.color_cycle_manager = _ColorCycleManager()
         self.preferences = Preferences()
 
@@ -402,8 +585,11 @@ class ParamsWindow:
 
         self.reset_by_default(call_callback=False)
         set_app_key("ParamsWindow.reset_by_rcParams", self.reset_by_rcParams)
+        set_app_key("ParamsWindow.get_rc_dict", self.get_rc_dict)
 
     def gui(self) -> None:
+        # the font table is filled even while the List tab isn't shown
+        self.font_family_manager.reset_check()
         if imgui.begin_tab_bar("RcParams"):
             if imgui.begin_tab_item("Preferences")[0]:
                 self.preferences.gui()
@@ -420,19 +606,95 @@ class ParamsWindow:
                 _title("Color")
                 self.color_cycle_manager.gui()
                 imgui.end_tab_item()
+
+            if imgui.begin_tab_item("Coverage")[0]:
+                self.gui_coverage()
+                imgui.end_tab_item()
             imgui.end_tab_bar()
 
         self.update_check()
+        self.font_rebuild_check()
+
+        self.scheduler.delay = self.preferences.replot_delay_ms / 1000
+        self.scheduler.tick(dragging=is_dragging())
         return
 
     def update_check(self):
-        need_update = [section.need_update() for section in self.sections]
-        if any(need_update):
-            self.callback()
+        keys = [key for section in self.sections for key in section.updated_keys()]
+        if keys:
+            # replot once the edits settled, see `ReplotScheduler`
+            self.scheduler.request(keys)
             for section in self.sections:
                 section.update()
         return
 
+    def _preview_ignores(self, keys: set[str]) -> bool:
+        _func = get_app_key("FigureWindow.reads_any")
+        return _func is not None and not _func(keys)
+
+    def gui_coverage(self) -> None:
+        _func = get_app_key("FigureWindow.get_read_keys")
+        read_keys: set[str] = _func() if _func is not None else set()
+        if not read_keys:
+            imgui.text("The preview has not been rendered yet.")
+            return
+
+        unread = [
+            (section.get_name(), key)
+            for section in self.sections
+            for key in section.get_keys()
+            if key not in read_keys
+        ]
+        n_keys = sum(len(section.get_keys()) for section in self.sections)
+
+        _title("Keys Not Read by the Preview")
+        imgui.text_wrapped(
+            f"{n_keys - len(unread)} of {n_keys} keys in the editor are read while "
+            "rendering the preview, editing the others doesn't replot."
+        )
+        if imgui.begin_table("Unread", 2, _TABLE_FLAGS):
+            imgui.table_setup_column("Section")
+            imgui.table_setup_column("Key")
+            imgui.table_headers_row()
+            for section_name, key in unread:
+                imgui.table_next_row()
+                imgui.table_set_column_index(0)
+                imgui.text(section_name)
+                imgui.table_set_column_index(1)
+                imgui.text(key)
+            imgui.end_table()
+
+        if imgui.collapsing_header(f"All Keys Read by the Preview ({len(read_keys)})"):
+            for key in sorted(read_keys):
+                imgui.text(key)
+        return
+
+    def gui_status(self) -> None:
+        imgui.same_line()
+        imgui.text_disabled(self.scheduler.status_text())
+        if self.font_rebuild is not None:
+            imgui.same_line()
+            imgui.text_disabled(self.font_rebuild.status_text())
+        return
+
+    def font_rebuild_check(self) -> None:
+        if self.font_rebuild is None:
+            return
+        fm = self.font_rebuild.poll()
+        if fm is not None:
+            # the font manager and the pickers switch in the same frame
+            install_font_manager(fm)
+            font_catalog.update(fm.ttflist)
+            glyph_coverage.load_async()
+            hello_imgui.log(hello_imgui.LogLevel.info, self.font_rebuild.status_text())
+        return
+
+    def shutdown(self) -> None:
+        for section in self.sections:
+            section.shutdown()
+        self.font_family_manager.close()
+        return
+
     def reset_by_rcParams(self, call_callback: bool = True) -> None:
         for section in self.sections:
             section.reset_by_rcParams()
@@ -445,17 +707,28 @@ class ParamsWindow:
         return
 
     def reset_by_default(self, call_callback: bool = True) -> None:
-        plt.style.use("default")
+        style_cache.apply("default")
         self.reset_by_rcParams(call_callback)
         return
 
     def reset_by_style(self, style_name: str) -> None:
+        # the default and the style are merged, rcParams is written once
         if self.preferences.reset_default_before_apply_new:
-            plt.style.use("default")
-        plt.style.use(style_name)
+            style_cache.apply("default", style_name)
+        else:
+            style_cache.apply(style_name)
         self.reset_by_rcParams()
         return
 
+    def get_rc_dict(self) -> dict[str, Any]:
+        """The rcParams covered by the editor, i.e. what `Download` writes."""
+        rc: dict[str, Any] = {}
+        for section in self.sections:
+            rc.update(section.rc_dict())
+        rc.update(self.font_family_manager.rc_dict())
+        rc.update(self.color_cycle_manager.rc_dict())
+        return dict(sorted(rc.items()))
+
     def save2matplotlibrc(self, filepath: str) -> None:
         hello_imgui.log(hello_imgui.LogLevel.info, "# Not Implemented Yet")
         return
@@ -524,8 +797,10 @@ class ParamsWindow:
         recache_font_clicked, _ = imgui.menu_item(
             f"{icons_fontawesome_6.ICON_FA_FONT} Recache Font", "", False
         )
-        if recache_font_clicked:
-            threading.Thread(target=_recache_font, daemon=True).start()
+        if recache_font_clicked and not (
+            self.font_rebuild is not None and self.font_rebuild.is_running()
+        ):
+            self.font_rebuild = FontCacheRebuild()
         # shortcut must be put in main loop or gui always show
         # if imgui.is_key_chord_pressed(imgui.Key.mod_ctrl | imgui.Key.s):
         #     print("Ctrl + S pressed")
@@ -543,3 +818,4 @@ class ParamsWindow:
 
     def load_app_settings(self, settings: dict) -> None:
         self.preferences.from_dict(settings)
+        self.preferences.apply_render_settings()
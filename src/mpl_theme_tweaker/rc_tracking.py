@@ -0,0 +1,41 @@
+"""Track which rcParams keys are read while rendering.
+
+`RcParams.__getitem__` is wrapped once, reads of the global rcParams are
+recorded for the threads inside `track_rc_reads` only. A render is a
+deterministic function of the rc values it reads, so editing a key it never
+read can't change its output.
+"""
+
+import contextlib
+import threading
+from typing import Iterator
+
+import matplotlib as mpl
+from matplotlib import RcParams
+
+_local = threading.local()
+_original_getitem = RcParams.__getitem__
+
+
+def _tracked_getitem(self, key):
+    reads: set[str] | None = getattr(_local, "reads", None)
+    if reads is not None and self is mpl.rcParams:
+        reads.add(key)
+    return _original_getitem(self, key)
+
+
+@contextlib.contextmanager
+def track_rc_reads() -> Iterator[set[str]]:
+    """Collect the keys of the global rcParams read by the current thread."""
+    if RcParams.__getitem__ is not _tracked_getitem:
+        RcParams.__getitem__ = _tracked_getitem  # type: ignore
+
+    outer: set[str] | None = getattr(_local, "reads", None)
+    reads: set[str] = set()
+    _local.reads = reads
+    try:
+        yield reads
+    finally:
+        _local.reads = outer
+        if outer is not None:
+            outer.update(reads)
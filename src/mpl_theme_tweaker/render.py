@@ -0,0 +1,444 @@
+"""Render the preview figure off the UI thread.
+
+Functionality:
+    - Take a snapshot of rcParams on the main thread for every replot request.
+    - Render the demo figure on a background worker, the latest request wins:
+      a pending job is replaced by a newer one and the result of a job that
+      was superseded while rendering is dropped.
+    - Keep the last figure alive, edits of paint-only keys (colors) restyle
+      its artists and draw it again without relayout.
+    - Render at a given dpi instead of figure.dpi, for draft previews.
+    - Optionally render in a pool of processes, each job carries its own rc
+      dict and the RGBA frame comes back through shared memory.
+    - Hand the finished RGBA frame back to the main thread, which owns the
+      OpenGL texture.
+    - Keep what the pool processes run free of GUI imports, including the
+      idle-priority processes of the style warm-up and the thumbnails.
+"""
+
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Literal
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+
+from mpl_theme_tweaker.figure import FIGSIZE, plot_figure, title_family
+from mpl_theme_tweaker.font_rebuild import sync_font_cache
+from mpl_theme_tweaker.mpl_utils import Figure2RGBA, ignore_font_warnings
+from mpl_theme_tweaker.paint import LiveFigureSet
+from mpl_theme_tweaker.rc_tracking import track_rc_reads
+from mpl_theme_tweaker.render_cache import frame_digest
+from mpl_theme_tweaker.tiles import TileRenderer
+
+RenderBackendName = Literal["thread", "process"]
+
+
+def snapshot_rcparams() -> dict[str, Any]:
+    """Copy the current rcParams, sorted by key, without re-validation."""
+    return {key: plt.rcParams._get(key) for key in plt.rcParams}
+
+
+def rcparams_changed(rc: dict[str, Any]) -> bool:
+    """Whether the live rcParams differ from the snapshot `rc`."""
+    try:
+        return any(plt.rcParams._get(key) != value for key, value in rc.items())
+    except KeyError:
+        return True
+
+
+# called as `render(rc, timings, dpi)`, a dpi of None renders at figure.dpi
+RenderFunc = Callable[[dict[str, Any], dict[str, float], float | None], np.ndarray]
+
+
+def render_preview(
+    rc: dict[str, Any], timings: dict[str, float], dpi: float | None = None
+) -> np.ndarray:
+    """Render the full demo figure with the live rcParams."""
+    start = time.perf_counter()
+    frame = Figure2RGBA(plot_figure(dpi))
+    timings["render"] = time.perf_counter() - start
+    return frame
+
+
+class FigureRenderer:
+    """Render the full demo figure, restyle the kept one for paint-only edits."""
+
+    def __init__(self):
+        self._figures = LiveFigureSet()
+
+    def render(
+        self, rc: dict[str, Any], timings: dict[str, float], dpi: float | None = None
+    ) -> np.ndarray:
+        start = time.perf_counter()
+        dpi = dpi or mpl.rcParams["figure.dpi"]
+        frame, kind = self._figures.get(dpi).render(
+            lambda: plot_figure(dpi), rc, token=tuple(title_family() or ())
+        )
+        timings["render" if kind == "build" else kind] = time.perf_counter() - start
+        return frame
+
+
+def get_render_func(tiled: bool) -> RenderFunc:
+    if tiled:
+        return TileRenderer().render
+    return FigureRenderer().render
+
+
+def format_timings(timings: dict[str, float]) -> str:
+    return ", ".join(f"{name} {t * 1000:.0f} ms" for name, t in timings.items())
+
+
+@dataclass
+class RenderJob:
+    generation: int
+    rc: dict[str, Any]
+    dpi: float | None = None
+
+
+@dataclass
+class RenderResult:
+    generation: int
+    frame: np.ndarray | None = None
+    elapsed: float = 0.0
+    error: str = ""
+    # False if rcParams were edited while the job was rendering, the frame
+    # may then mix two states and must not be reused for another request.
+    consistent: bool = True
+    timings: dict[str, float] = field(default_factory=dict)
+    # rc keys read while rendering, see `track_rc_reads`
+    read_keys: set[str] = field(default_factory=set)
+    # `frame_digest` of the frame, computed off the main thread
+    digest: str = ""
+
+
+class RenderBackend(ABC):
+    @abstractmethod
+    def submit(self, rc: dict[str, Any], dpi: float | None = None) -> int:
+        """Queue a render of the state `rc`, return the job generation.
+
+        `dpi` overrides figure.dpi, None renders at figure.dpi.
+        """
+
+    @abstractmethod
+    def poll(self) -> RenderResult | None:
+        """Take the finished result of the latest job, if any."""
+
+    @abstractmethod
+    def cancel(self) -> None:
+        """Drop every queued job and the result of the running ones."""
+
+    @abstractmethod
+    def is_busy(self) -> bool: ...
+
+    @abstractmethod
+    def shutdown(self) -> None: ...
+
+
+class RenderWorker(RenderBackend):
+    """Render jobs on a daemon thread, only the latest job is kept.
+
+    The thread renders with the live rcParams, `rc` is the snapshot the job
+    stands for.
+    """
+
+    def __init__(self, render_func: RenderFunc = render_preview):
+        self.render_func = render_func
+
+        self._cond = threading.Condition()
+        self._job: RenderJob | None = None
+        self._result: RenderResult | None = None
+        self._generation: int = 0
+        self._rendering: bool = False
+        self._closed: bool = False
+
+        self._thread = threading.Thread(
+            target=self._run, name="RenderWorker", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, rc: dict[str, Any], dpi: float | None = None) -> int:
+        with self._cond:
+            self._generation += 1
+            # a job still waiting in the slot is stale now, replace it
+            self._job = RenderJob(self._generation, rc, dpi)
+            self._cond.notify()
+            return self._generation
+
+    def poll(self) -> RenderResult | None:
+        with self._cond:
+            result, self._result = self._result, None
+        return result
+
+    def cancel(self) -> None:
+        with self._cond:
+            self._generation += 1
+            self._job = None
+            self._result = None
+        return
+
+    def is_busy(self) -> bool:
+        with self._cond:
+            return self._rendering or self._job is not None
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._job = None
+            self._cond.notify()
+        return
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._job is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job, self._job = self._job, None
+                self._rendering = True
+
+            result = self._render(job)
+
+            with self._cond:
+                self._rendering = False
+                if job.generation == self._generation:
+                    self._result = result
+
+    def _render(self, job: RenderJob) -> RenderResult:
+        start = time.perf_counter()
+        result = RenderResult(job.generation)
+        try:
+            with track_rc_reads() as read_keys:
+                result.frame = self.render_func(job.rc, result.timings, job.dpi)
+            result.read_keys = read_keys
+
+            hash_start = time.perf_counter()
+            result.digest = frame_digest(result.frame)
+            result.timings["hash"] = time.perf_counter() - hash_start
+        except Exception as e:
+            result.error = str(e)
+        result.elapsed = time.perf_counter() - start
+        result.consistent = not rcparams_changed(job.rc)
+        return result
+
+
+_process_render_func: RenderFunc = render_preview
+
+
+def _init_render_process(tiled: bool) -> None:
+    global _process_render_func
+    mpl.use("Agg")
+    ignore_font_warnings()
+    _process_render_func = get_render_func(tiled)
+    sync_font_cache()
+    return
+
+
+def init_idle_render_process(tiled: bool) -> None:
+    """Like `_init_render_process`, at idle priority.
+
+    For the background renders, which must never slow down the GUI or the
+    interactive renders.
+    """
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            IDLE_PRIORITY_CLASS = 0x40
+            kernel32 = ctypes.windll.kernel32  # type: ignore
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), IDLE_PRIORITY_CLASS)
+        else:
+            os.nice(19)
+    except (OSError, AttributeError):
+        pass
+    _init_render_process(tiled)
+    return
+
+
+def _render_in_process(
+    rc: dict[str, Any], shm_name: str, dpi: float | None
+) -> dict[str, Any]:
+    """Render `rc` in a pool process and write the frame to `shm_name`."""
+    start = time.perf_counter()
+    # the fonts of a rebuild started after this process
+    sync_font_cache()
+    mpl.rcdefaults()
+    plt.rcParams.update(rc)
+    timings = {"setup": time.perf_counter() - start}
+
+    with track_rc_reads() as read_keys:
+        frame = _process_render_func(rc, timings, dpi)
+    render_done = time.perf_counter()
+    digest = frame_digest(frame)
+    timings["hash"] = time.perf_counter() - render_done
+
+    copy_start = time.perf_counter()
+
+    shm = SharedMemory(name=shm_name, track=False)
+    try:
+        if frame.nbytes > shm.size:
+            raise ValueError(f"frame of {frame.nbytes} bytes exceeds the buffer")
+        out = np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf)
+        out[...] = frame
+        del out
+    finally:
+        shm.close()
+    timings["copy"] = time.perf_counter() - copy_start
+
+    return {
+        "shape": frame.shape,
+        "timings": timings,
+        "read_keys": read_keys,
+        "digest": digest,
+    }
+
+
+def render_in_process(rc: dict[str, Any], dpi: float | None = None) -> np.ndarray:
+    """Render `rc` from the defaults, in a process set up by `_init_render_process`."""
+    sync_font_cache()
+    mpl.rcdefaults()
+    plt.rcParams.update(rc)
+    return _process_render_func(rc, {}, dpi)
+
+
+def render_thumbnail(
+    rc: dict[str, Any], size: tuple[int, int], oversample: int = 2
+) -> np.ndarray:
+    """The demo figure with `rc` applied on the defaults, downsampled to `size`.
+
+    Rendered `oversample` times larger first, the lines stay readable.
+    """
+    sync_font_cache()
+    mpl.rcdefaults()
+    plt.rcParams.update(rc)
+    dpi = size[0] * oversample / FIGSIZE[0]
+    frame = Figure2RGBA(plot_figure(dpi))
+    image = Image.fromarray(frame).resize(size, Image.Resampling.LANCZOS)
+    return np.asarray(image)
+
+
+def _frame_nbytes_bound(rc: dict[str, Any], dpi: float | None) -> int:
+    dpi = dpi or rc.get("figure.dpi", mpl.rcParamsDefault["figure.dpi"])
+    width = math.ceil(FIGSIZE[0] * dpi) + 1
+    height = math.ceil(FIGSIZE[1] * dpi) + 1
+    return width * height * 4
+
+
+@dataclass
+class _ProcessJob:
+    generation: int
+    future: Future
+    shm: SharedMemory
+    submitted: float
+
+
+class ProcessRenderPool(RenderBackend):
+    """Render jobs in a pool of processes, each job renders its own rc dict.
+
+    Several jobs can be in flight at once, so a new edit doesn't wait for the
+    render of the previous one, but only the result of the latest job is
+    handed out. The main thread owns the shared memory of every job.
+    """
+
+    def __init__(self, max_workers: int = 2, tiled: bool = False):
+        self.max_workers = max(1, max_workers)
+        self.tiled = tiled
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            # never fork the GUI process, it holds a GL context and threads
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_render_process,
+            initargs=(tiled,),
+        )
+        self._jobs: dict[int, _ProcessJob] = {}
+        self._generation: int = 0
+
+    def submit(self, rc: dict[str, Any], dpi: float | None = None) -> int:
+        # supersede every job in flight, the new job takes the next generation
+        self.cancel()
+
+        shm = SharedMemory(create=True, size=_frame_nbytes_bound(rc, dpi))
+        try:
+            future = self._executor.submit(_render_in_process, rc, shm.name, dpi)
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+        self._jobs[self._generation] = _ProcessJob(
+            self._generation, future, shm, time.perf_counter()
+        )
+        return self._generation
+
+    def poll(self) -> RenderResult | None:
+        latest: RenderResult | None = None
+        for generation, job in sorted(self._jobs.items()):
+            if not job.future.done():
+                continue
+            if generation == self._generation:
+                latest = self._collect(job)
+            self._release(job)
+        return latest
+
+    def cancel(self) -> None:
+        self._generation += 1
+
+        # jobs which haven't started yet are stale, give their slot away
+        for job in list(self._jobs.values()):
+            if job.future.cancel():
+                self._release(job)
+        return
+
+    def is_busy(self) -> bool:
+        return bool(self._jobs)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for job in list(self._jobs.values()):
+            self._release(job)
+        return
+
+    def _collect(self, job: _ProcessJob) -> RenderResult:
+        result = RenderResult(job.generation)
+        result.elapsed = time.perf_counter() - job.submitted
+        try:
+            output = job.future.result()
+        except Exception as e:
+            result.error = str(e)
+            return result
+
+        shape = output["shape"]
+        view = np.ndarray(shape, dtype=np.uint8, buffer=job.shm.buf)
+        result.frame = view.copy()
+        del view
+
+        result.read_keys = output["read_keys"]
+        result.digest = output["digest"]
+        timings: dict[str, float] = output["timings"]
+        busy = sum(timings.values())
+        result.timings = {"queue": max(0.0, result.elapsed - busy), **timings}
+        return result
+
+    def _release(self, job: _ProcessJob) -> None:
+        self._jobs.pop(job.generation, None)
+        job.shm.close()
+        job.shm.unlink()
+        return
+
+
+def create_render_backend(
+    name: RenderBackendName, max_workers: int = 2, tiled: bool = False
+) -> RenderBackend:
+    if name == "process":
+        return ProcessRenderPool(max_workers, tiled)
+    return RenderWorker(get_render_func(tiled))
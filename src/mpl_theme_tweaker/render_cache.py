@@ -0,0 +1,89 @@
+"""RenderCache
+
+Functionality:
+    - Hash an rc dict into a stable key, independent of the key order.
+    - Hash rendered frames, to tell a byte-identical frame from a new one.
+    - Keep rendered RGBA frames by that key under a memory budget, the least
+      recently used frames are evicted first.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+
+def rc_hash(rc: dict[str, Any]) -> str:
+    """Stable hash of an rc dict, validated values have a canonical repr."""
+    h = hashlib.blake2b(digest_size=16)
+    for key in sorted(rc):
+        h.update(f"{key}\0{rc[key]!r}\n".encode())
+    return h.hexdigest()
+
+
+def frame_digest(frame: np.ndarray) -> str:
+    """Hash of the shape and the pixels of an RGBA frame."""
+    h = hashlib.blake2b(str(frame.shape).encode(), digest_size=16)
+    h.update(np.ascontiguousarray(frame).data)
+    return h.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes: int = max_bytes
+        self.nbytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self._frames: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._frames
+
+    def get(self, key: str) -> np.ndarray | None:
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+
+        self._frames.move_to_end(key)
+        self.hits += 1
+        return frame
+
+    def put(self, key: str, frame: np.ndarray) -> None:
+        if frame.nbytes > self.max_bytes:
+            return
+
+        old = self._frames.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+
+        self._frames[key] = frame
+        self.nbytes += frame.nbytes
+        self._evict()
+        return
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._evict()
+        return
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self.nbytes = 0
+        return
+
+    def stats_text(self) -> str:
+        return (
+            f"hits {self.hits} / misses {self.misses},"
+            f" {len(self._frames)} frames, {self.nbytes / 2**20:.1f} MB"
+        )
+
+    def _evict(self) -> None:
+        while self.nbytes > self.max_bytes and self._frames:
+            _, frame = self._frames.popitem(last=False)
+            self.nbytes -= frame.nbytes
+        return
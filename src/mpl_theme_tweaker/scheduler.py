@@ -0,0 +1,90 @@
+"""ReplotScheduler
+
+Functionality:
+    - Gather entry edits and issue a single replot for the final state, once
+      no edit arrived for `delay` seconds and no mouse drag is active.
+    - Keep count of how many edits were merged into each replot.
+    - Skip the replot when the preview doesn't read any of the edited keys.
+"""
+
+import time
+from typing import Callable
+
+from imgui_bundle import hello_imgui, imgui  # type: ignore
+
+
+def is_dragging() -> bool:
+    """Whether a widget is held with the mouse, e.g. a step button or picker."""
+    return imgui.is_any_item_active() and imgui.is_mouse_down(imgui.MouseButton_.left)
+
+
+class ReplotScheduler:
+    def __init__(
+        self,
+        callback: Callable[[], None],
+        delay: float = 0.15,
+        is_ignored: Callable[[set[str]], bool] | None = None,
+    ):
+        self.callback = callback
+        self.delay = delay
+        # whether the preview doesn't depend on any of the given keys
+        self.is_ignored = is_ignored
+
+        self.pending_keys: set[str] = set()
+        self.pending_edits: int = 0
+        self.last_edit_time: float = 0.0
+
+        self.last_merged: int = 0
+        self.total_edits: int = 0
+        self.total_replots: int = 0
+        self.total_skipped: int = 0
+
+    def request(self, keys: list[str]) -> None:
+        """Record the rc keys changed in this frame."""
+        if not keys:
+            return
+        self.pending_keys.update(keys)
+        self.pending_edits += len(keys)
+        self.total_edits += len(keys)
+        self.last_edit_time = time.perf_counter()
+        return
+
+    def has_pending(self) -> bool:
+        return self.pending_edits > 0
+
+    def tick(self, dragging: bool = False) -> None:
+        """Call once per frame, replot if the edits have settled."""
+        if not self.has_pending() or dragging:
+            return
+        if time.perf_counter() - self.last_edit_time < self.delay:
+            return
+        self.flush()
+        return
+
+    def flush(self) -> None:
+        merged, keys = self.pending_edits, self.pending_keys
+        self.pending_keys = set()
+        self.pending_edits = 0
+
+        self.last_merged = merged
+        if self.is_ignored is not None and self.is_ignored(keys):
+            self.total_skipped += 1
+            hello_imgui.log(
+                hello_imgui.LogLevel.info,
+                f"skipped replot, the preview doesn't read {', '.join(sorted(keys))}",
+            )
+            return
+
+        self.total_replots += 1
+        if merged > 1:
+            hello_imgui.log(
+                hello_imgui.LogLevel.info, f"merged {merged} edits into one replot"
+            )
+        self.callback()
+        return
+
+    def status_text(self) -> str:
+        return (
+            f"edits {self.total_edits} / replots {self.total_replots}"
+            f" / skipped {self.total_skipped} (last merged {self.last_merged})"
+        )
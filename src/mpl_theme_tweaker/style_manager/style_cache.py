@@ -0,0 +1,122 @@
+"""StyleCache
+
+Functionality:
+    - Parse and validate a style once, the library styles and "default" by
+      name, the style files by path, size and mtime, an edited file is
+      parsed again.
+    - Apply a list of styles like `plt.style.use`, merged into one dict and
+      written to rcParams in one pass, without validating again.
+"""
+
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib import RcParams
+from matplotlib.style.core import STYLE_BLACKLIST
+
+# parsed styles kept, switching between dozens of styles never parses twice
+STYLE_CACHE_SIZE = 256
+
+StyleSpec = str | Path
+StyleKey = tuple[str, int, int]
+
+
+class StyleCache:
+    """Validated rc dicts of the styles, shared by the menus."""
+
+    def __init__(self, capacity: int = STYLE_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._styles: OrderedDict[StyleKey, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, style: StyleSpec) -> dict[str, Any]:
+        """The validated rcParams of `style`, without the blacklisted keys.
+
+        Raises OSError like `plt.style.use` if `style` is neither a library
+        style nor a readable file.
+        """
+        key = self._key(style)
+        with self._lock:
+            rc = self._styles.get(key)
+            if rc is not None:
+                self._styles.move_to_end(key)
+                self.hits += 1
+                return rc
+
+        rc = self._parse(style)
+        with self._lock:
+            self.misses += 1
+            self._styles[key] = rc
+            while len(self._styles) > self.capacity:
+                self._styles.popitem(last=False)
+        return rc
+
+    def merged(self, *styles: StyleSpec) -> dict[str, Any]:
+        """The rcParams of `styles` applied from first to last."""
+        rc: dict[str, Any] = {}
+        for style in styles:
+            rc.update(self.get(style))
+        return rc
+
+    def apply(self, *styles: StyleSpec) -> None:
+        """Like `plt.style.use(list(styles))`, in one pass."""
+        # validated when cached, written as is
+        mpl.rcParams._update_raw(self.merged(*styles))  # type: ignore
+        return
+
+    def clear(self) -> None:
+        with self._lock:
+            self._styles.clear()
+        return
+
+    def _key(self, style: StyleSpec) -> StyleKey:
+        if isinstance(style, str):
+            style = {"mpl20": "default", "mpl15": "classic"}.get(style, style)
+            if style == "default" or style in plt.style.library:
+                return (style, 0, 0)
+        path = os.path.abspath(style)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # never cached, `_parse` raises
+            return (path, -1, -1)
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def _parse(self, style: StyleSpec) -> dict[str, Any]:
+        name = self._key(style)[0] if isinstance(style, str) else ""
+        if name == "default":
+            params: RcParams = mpl.rcParamsDefault
+        elif name in plt.style.library:
+            params = plt.style.library[name]
+        else:
+            try:
+                # validated while read, bad lines are logged once
+                params = mpl._rc_params_in_file(style)  # type: ignore
+            except OSError as err:
+                raise OSError(f"{style!r} is not a valid style file") from err
+
+        rc: dict[str, Any] = {}
+        for key in params:
+            if key not in STYLE_BLACKLIST:
+                # the raw value, without the deprecation and backend lookups
+                rc[key] = dict.__getitem__(params, key)
+            elif params is not mpl.rcParamsDefault:
+                warnings.warn(
+                    f"Style includes a parameter, {key!r}, that is not related"
+                    " to style.  Ignoring this parameter.",
+                    UserWarning,
+                )
+        return rc
+
+
+# parsed styles, shared by the style menus
+style_cache = StyleCache()
@@ -1,62 +1,46 @@
 """StyleManager
 
 Functionality:
-    - Find all style files in the directory recursively.
+    - Find all style files in the directory recursively, on a background
+      thread, see StyleScanner.
       Use a dict to save filename and path.
+    - Watch the directory, rescan it when style files are added, removed
+      or renamed, and re-apply the applied style when its file changes.
+    - Show a thumbnail of the hovered style, see StyleThumbnails.
 
 
 """
 
+import os
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-from imgui_bundle import imgui
+from imgui_bundle import hello_imgui, imgui
 
 from mpl_theme_tweaker._global import get_app_key, set_app_key
+from mpl_theme_tweaker.style_manager.style_cache import style_cache
+from mpl_theme_tweaker.style_manager.style_scanner import StyleScanner
+from mpl_theme_tweaker.style_manager.style_thumbnails import StyleThumbnails
+from mpl_theme_tweaker.style_manager.style_watcher import StyleWatcher
 
 
-def search_mplstyle_files(
-    search_dir: str | Path, max_files: int = 100
-) -> dict[str, list[str]]:
-    """Search all .mplstyle files in the directory recursively, with file count limit.
-
-    Args:
-        search_dir (str | Path): The directory to search.
-        max_files (int): Maximum number of files to collect. If exceeded,
-            return the collected files immediately. Defaults to 100.
-
-    Returns:
-        dict[str, list[str]]: A dict with directory name as key and a list of style file paths as value.
-    """
-    root_path = Path(search_dir).absolute()
-    result: dict[str, list[str]] = {}
-    total_files = 0
-
-    for file_path in root_path.rglob("*.mplstyle"):
-        if not file_path.is_file():
-            continue
-
-        file_dir = file_path.parent
-        rel_dir = file_dir.relative_to(root_path)
-        dict_key = "root" if rel_dir == Path(".") else str(rel_dir)
-
-        if dict_key not in result:
-            result[dict_key] = []
-
-        result[dict_key].append(str(file_path.absolute()))
-        total_files += 1
-
-        if total_files >= max_files:
-            break
-
-    return result
+def _file_mtime(path: Path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
 
 class StyleManager:
     directory: Path
-    styles_map: dict[str, list[Path]] = {}
+    scanner: StyleScanner | None = None
+    watcher: StyleWatcher | None = None
+    # the style file applied from the menu, and its mtime at that time
+    applied_style: Path | None = None
+    applied_mtime: int | None = None
 
     def __init__(self):
+        # shared with the official styles of the Style menu
+        self.thumbnails = StyleThumbnails()
         set_app_key("StyleManager.set_path", self.set_path)
 
     def set_path(self, path: Path | str) -> None:
@@ -65,24 +49,86 @@ class StyleManager:
         return
 
     def reload(self) -> None:
-        result = search_mplstyle_files(self.directory)
-        self.styles_map = {k: [Path(v) for v in vs] for k, vs in result.items()}
+        # the previous directory may still be scanning, e.g. while typing
+        if self.scanner is not None:
+            self.scanner.cancel()
+        self.scanner = StyleScanner(self.directory)
+
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.watcher = StyleWatcher(self.directory)
         return
 
+    def shutdown(self) -> None:
+        if self.scanner is not None:
+            self.scanner.cancel()
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.thumbnails.shutdown()
+        return
+
+    def poll(self) -> None:
+        """Apply the changes the watcher found, call once per frame."""
+        if self.watcher is None or self.scanner is None:
+            return
+        changes = self.watcher.take_changes()
+        if changes is None:
+            return
+        changed, listing_changed = changes
+        self.thumbnails.forget(set(changed))
+
+        if listing_changed:
+            # the index makes it list only the changed directories
+            self.scanner.cancel()
+            self.scanner = StyleScanner(self.directory, self.styles_map)
+
+        if (
+            self.applied_style is not None
+            and _file_mtime(self.applied_style) != self.applied_mtime
+        ):
+            if self.applied_style.is_file():
+                hello_imgui.log(
+                    hello_imgui.LogLevel.info,
+                    f"Style `{self.applied_style.stem}` changed, re-applied.",
+                )
+                self.apply_style(self.applied_style)
+            else:
+                self.applied_style = None
+        return
+
+    def apply_style(self, style_file: Path) -> None:
+        style_cache.apply(style_file)
+        self.applied_style = style_file
+        self.applied_mtime = _file_mtime(style_file)
+
+        # will call FigureWindow.replot_func automatically
+        _func = get_app_key("ParamsWindow.reset_by_rcParams")
+        if _func is not None:
+            _func()
+        return
+
+    @property
+    def styles_map(self) -> dict[str, list[Path]]:
+        """Style files by directory, growing while the scan runs."""
+        if self.scanner is None:
+            return {}
+        return self.scanner.styles_map
+
     def get_path(self) -> Path:
         return self.directory
 
     def menu_gui(self) -> None:
+        if self.scanner is not None and self.scanner.is_running():
+            imgui.menu_item(self.scanner.status_text(), "", False, enabled=False)
+
         for dir_name, style_files in self.styles_map.items():
             if imgui.begin_menu(dir_name):
                 for style_file in style_files:
                     menu_label = style_file.stem
                     clicked, _ = imgui.menu_item(menu_label, "", False)
+                    if imgui.is_item_hovered():
+                        self.thumbnails.tooltip(style_file)
                     if clicked:
-                        plt.style.use(style_file)
-                        # will call FigureWindow.replot_func automatically
-                        _func = get_app_key("ParamsWindow.reset_by_rcParams")
-                        if _func is not None:
-                            _func()
+                        self.apply_style(style_file)
                 imgui.end_menu()
         return
@@ -0,0 +1,193 @@
+"""StyleScanner
+
+Functionality:
+    - Find the .mplstyle files under a directory with os.scandir, on a
+      background thread, without a file count limit.
+    - Publish the result while scanning, a new dict every time, so readers
+      iterate a consistent snapshot without locking.
+    - Keep an index of every scanned directory in a cache file, with its
+      mtime, a rescan only lists the directories which changed since.
+"""
+
+import json
+import os
+import threading
+import time
+import warnings
+from pathlib import Path
+
+from mpl_theme_tweaker.cache_folder import get_cache_folder
+
+STYLE_SUFFIX = ".mplstyle"
+# seconds between two published results while scanning
+PUBLISH_INTERVAL = 0.1
+# scanned roots kept in the index, the most recent ones
+INDEX_MAX_ROOTS = 8
+INDEX_VERSION = 1
+
+# mtime_ns, style file names and subdirectory names of a directory
+DirRecord = tuple[int, list[str], list[str]]
+
+_index_lock = threading.Lock()
+
+
+def scan_directory(path: str) -> tuple[list[str], list[str]]:
+    """Sorted style file names and subdirectory names of `path`."""
+    files: list[str] = []
+    dirs: list[str] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                # like Path.rglob, symlinked directories aren't followed
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                elif entry.name.endswith(STYLE_SUFFIX) and entry.is_file():
+                    files.append(entry.name)
+            except OSError:
+                continue
+    return sorted(files), sorted(dirs)
+
+
+def _index_path() -> Path:
+    return get_cache_folder() / "style_index.json"
+
+
+def load_style_index(root: str) -> dict[str, DirRecord]:
+    """Directory records of `root` by relative path, empty if never scanned."""
+    try:
+        data = json.loads(_index_path().read_text(encoding="utf-8"))
+        if data["version"] != INDEX_VERSION:
+            return {}
+        return {
+            rel: (mtime, files, dirs)
+            for rel, (mtime, files, dirs) in data["roots"].get(root, {}).items()
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def save_style_index(root: str, records: dict[str, DirRecord]) -> None:
+    path = _index_path()
+    with _index_lock:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            roots = data["roots"] if data["version"] == INDEX_VERSION else {}
+        except (OSError, ValueError, KeyError, TypeError):
+            roots = {}
+
+        # the latest root last, the oldest roots are dropped first
+        roots.pop(root, None)
+        roots[root] = records
+        for old_root in list(roots)[:-INDEX_MAX_ROOTS]:
+            del roots[old_root]
+
+        data = {"version": INDEX_VERSION, "roots": roots}
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            warnings.warn(f"Failed to save the style index: {e}", UserWarning)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    return
+
+
+class StyleScanner:
+    """Scan `root` on a background thread, `styles_map` grows while it runs.
+
+    `styles_map` is never modified in place, it is replaced by a new dict.
+    A rescan passes the previous result, which is kept until it finishes.
+    """
+
+    def __init__(self, root: Path, styles_map: dict[str, list[Path]] | None = None):
+        self.root = root
+        self.styles_map: dict[str, list[Path]] = styles_map or {}
+        self._stream = styles_map is None
+
+        self.found: int = 0
+        self.listed: int = 0
+        self.reused: int = 0
+        self.elapsed: float = 0.0
+
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="StyleScanner", daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop scanning, the index isn't saved."""
+        self._cancelled.set()
+        return
+
+    def is_running(self) -> bool:
+        return not self._finished.is_set()
+
+    def status_text(self) -> str:
+        if self.is_running():
+            return f"Scanning styles... {self.found} found"
+        return (
+            f"{self.found} styles in {self.elapsed:.2f} s, listed {self.listed}"
+            f" directories, reused {self.reused}"
+        )
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            self._scan()
+        except Exception as e:
+            warnings.warn(f"Failed to scan `{self.root}`: {e}", UserWarning)
+        self.elapsed = time.perf_counter() - start
+        self._finished.set()
+        return
+
+    def _scan(self) -> None:
+        root = str(self.root)
+        index = load_style_index(root)
+        records: dict[str, DirRecord] = {}
+        styles_map: dict[str, list[Path]] = {}
+        last_publish = time.perf_counter()
+
+        stack = ["."]
+        while stack:
+            if self._cancelled.is_set():
+                return
+            rel_dir = stack.pop()
+            path = os.path.normpath(os.path.join(root, rel_dir))
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+
+            # an unchanged mtime means no entry was added, removed or renamed
+            record = index.get(rel_dir)
+            if record is not None and record[0] == mtime:
+                files, dirs = record[1], record[2]
+                self.reused += 1
+            else:
+                try:
+                    files, dirs = scan_directory(path)
+                except OSError:
+                    continue
+                self.listed += 1
+            records[rel_dir] = (mtime, files, dirs)
+
+            if files:
+                dict_key = "root" if rel_dir == "." else rel_dir
+                styles_map[dict_key] = [Path(path, name) for name in files]
+                self.found += len(files)
+            # reversed, the subdirectories are popped in sorted order
+            stack.extend(
+                os.path.normpath(os.path.join(rel_dir, name)) for name in reversed(dirs)
+            )
+
+            now = time.perf_counter()
+            if self._stream and now - last_publish > PUBLISH_INTERVAL:
+                self.styles_map = dict(styles_map)
+                last_publish = now
+
+        self.styles_map = styles_map
+        save_style_index(root, records)
+        return
@@ -0,0 +1,311 @@
+"""StyleThumbnails
+
+Functionality:
+    - Small previews of the styles of the Style menu, shown on hover.
+    - Keep the thumbnails in one memory-mapped file of fixed slots, keyed by
+      the hash of the style content, the least recently used slot is reused
+      when the file is full.
+    - Look up and hash the styles on a background thread, render the missing
+      thumbnails in a pool of processes at idle priority, the menu never
+      waits for either.
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib as mpl
+import numpy as np
+from imgui_bundle import imgui  # type: ignore
+
+from mpl_theme_tweaker.cache_folder import get_cache_folder
+from mpl_theme_tweaker.figure import FIGSIZE
+from mpl_theme_tweaker.opengl import create_texture_from_array
+from mpl_theme_tweaker.render import init_idle_render_process, render_thumbnail
+from mpl_theme_tweaker.render_cache import rc_hash
+from mpl_theme_tweaker.style_manager.style_cache import StyleSpec, style_cache
+from mpl_theme_tweaker.texture_registry import registry
+
+THUMBNAIL_WIDTH = 160
+THUMBNAIL_HEIGHT = round(THUMBNAIL_WIDTH * FIGSIZE[1] / FIGSIZE[0])
+# rendered larger, then downsampled, the lines stay readable
+THUMBNAIL_OVERSAMPLE = 2
+THUMBNAIL_SLOTS = 512
+THUMBNAIL_TEXTURES = 64
+STORE_VERSION = 1
+
+
+def style_content_hash(style: StyleSpec) -> str:
+    """Hash of what `style` sets, two files with one content share it."""
+    rc = style_cache.merged("default", style)
+    return rc_hash({"matplotlib": mpl.__version__, **rc})
+
+
+class ThumbnailStore:
+    """Thumbnails in fixed slots of a memory-mapped file, by content hash.
+
+    Not thread-safe, used by one thread at a time.
+    """
+
+    def __init__(self, folder: Path, slots: int = THUMBNAIL_SLOTS):
+        self.slots = slots
+        self.data_path = folder / "thumbnails.bin"
+        self.index_path = folder / "thumbnails.json"
+        shape = (slots, THUMBNAIL_HEIGHT, THUMBNAIL_WIDTH, 4)
+
+        # content hash -> slot, least recently used first
+        self.index: OrderedDict[str, int] = OrderedDict()
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if data["version"] == STORE_VERSION and data["shape"] == list(shape):
+                self.index = OrderedDict(data["slots"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        mode = "r+" if self.index and self.data_path.is_file() else "w+"
+        try:
+            self.images = np.memmap(self.data_path, np.uint8, mode, shape=shape)
+        except ValueError:
+            # the file has another size, e.g. a new slot count
+            self.index.clear()
+            self.images = np.memmap(self.data_path, np.uint8, "w+", shape=shape)
+
+    def get(self, key: str) -> np.ndarray | None:
+        slot = self.index.get(key)
+        if slot is None:
+            return None
+        self.index.move_to_end(key)
+        return np.array(self.images[slot])
+
+    def put(self, key: str, image: np.ndarray) -> None:
+        slot = self.index.pop(key, None)
+        if slot is None:
+            if len(self.index) < self.slots:
+                slot = len(self.index)
+            else:
+                _, slot = self.index.popitem(last=False)
+                # the index on disk must not name the slot while it holds
+                # the pixels of another key
+                self.flush()
+        self.images[slot] = image
+        self.index[key] = slot
+        return
+
+    def flush(self) -> None:
+        """Write the pixels, then the index which refers to them."""
+        self.images.flush()
+        data = {
+            "version": STORE_VERSION,
+            "shape": list(self.images.shape),
+            "slots": list(self.index.items()),
+        }
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+        return
+
+
+class StyleThumbnails:
+    """Thumbnails by style, `tooltip` is called on the main thread."""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+
+        # style -> (texture ref, texture id), the least recently shown first
+        self._textures: OrderedDict[StyleSpec, tuple[imgui.ImTextureRef, int]] = (
+            OrderedDict()
+        )
+        self._failed: set[StyleSpec] = set()
+        self._pending: deque[StyleSpec] = deque(maxlen=16)
+        self._queued: set[StyleSpec] = set()
+        # times each style was forgotten, a result of an older generation is
+        # of the content before the edit
+        self._generations: dict[StyleSpec, int] = {}
+        self._done: list[tuple[StyleSpec, int, np.ndarray | None]] = []
+        self._cond = threading.Condition()
+        self._store: ThumbnailStore | None = None
+        self._store_lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        # renders in flight, the later hovers wait in `_pending` meanwhile
+        self._slots = threading.Semaphore(max_workers)
+        self._thread: threading.Thread | None = None
+        self._closed: bool = False
+
+    def tooltip(self, style: StyleSpec) -> None:
+        """Show the thumbnail of `style` in a tooltip, for the hovered item."""
+        self.poll()
+        if not imgui.begin_tooltip():
+            return
+
+        texture = self._get(style)
+        if texture is not None:
+            imgui.image(texture[0], (THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
+        elif style in self._failed:
+            imgui.text_disabled("no preview")
+        else:
+            imgui.text_disabled("rendering preview...")
+        imgui.end_tooltip()
+        return
+
+    def poll(self) -> None:
+        """Create the textures of the finished thumbnails."""
+        with self._cond:
+            done, self._done = self._done, []
+            self._queued.difference_update(style for style, _, _ in done)
+            generations = self._generations
+
+        for style, generation, image in done:
+            if generation != generations.get(style, 0):
+                # rendered before `forget`, requested again on the next hover
+                continue
+            if image is None:
+                self._failed.add(style)
+                continue
+            texture_id = create_texture_from_array(image)
+            registry.register(
+                texture_id,
+                self,
+                "thumbnail",
+                THUMBNAIL_WIDTH,
+                THUMBNAIL_HEIGHT,
+                on_evict=self.clear,
+            )
+            self._textures[style] = (imgui.ImTextureRef(texture_id), texture_id)
+
+        while len(self._textures) > THUMBNAIL_TEXTURES:
+            _, (_, texture_id) = self._textures.popitem(last=False)
+            registry.release(texture_id)
+        return
+
+    def clear(self) -> None:
+        for _, texture_id in self._textures.values():
+            registry.release(texture_id)
+        self._textures.clear()
+        return
+
+    def forget(self, styles: set[StyleSpec]) -> None:
+        """Drop the thumbnails of `styles`, e.g. of edited style files.
+
+        The renders of `styles` still in flight are dropped when they finish.
+        """
+        with self._cond:
+            generations = dict(self._generations)
+            for style in styles:
+                generations[style] = generations.get(style, 0) + 1
+            self._generations = generations
+        for style in styles:
+            texture = self._textures.pop(style, None)
+            if texture is not None:
+                registry.release(texture[1])
+            self._failed.discard(style)
+        return
+
+    def shutdown(self) -> None:
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        return
+
+    def _get(self, style: StyleSpec) -> tuple[imgui.ImTextureRef, int] | None:
+        if style in self._textures:
+            self._textures.move_to_end(style)
+            return self._textures[style]
+
+        with self._cond:
+            if style in self._pending:
+                self._pending.remove(style)
+            elif style in self._queued:
+                return None
+            elif len(self._pending) == self._pending.maxlen:
+                self._queued.discard(self._pending[0])
+            # hovered last, looked up first
+            self._pending.append(style)
+            self._queued.add(style)
+            self._cond.notify()
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="StyleThumbnails", daemon=True
+                )
+                self._thread.start()
+        return None
+
+    def _run(self) -> None:
+        store = ThumbnailStore(get_cache_folder())
+        with self._store_lock:
+            self._store = store
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                style = self._pending.pop()
+                generation = self._generations.get(style, 0)
+
+            try:
+                key = style_content_hash(style)
+            except (OSError, ValueError):
+                self._finish(style, generation, None)
+                continue
+
+            with self._store_lock:
+                image = store.get(key)
+            if image is not None:
+                self._finish(style, generation, image)
+                continue
+
+            self._slots.acquire()
+            if self._closed:
+                return
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_idle_render_process,
+                    initargs=(False,),
+                )
+            try:
+                future = self._executor.submit(
+                    render_thumbnail,
+                    style_cache.merged("default", style),
+                    (THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT),
+                    THUMBNAIL_OVERSAMPLE,
+                )
+            except RuntimeError:
+                # shut down
+                return
+            future.add_done_callback(
+                lambda future, style=style, generation=generation, key=key: (
+                    self._rendered(style, generation, key, future)
+                )
+            )
+
+    def _rendered(
+        self, style: StyleSpec, generation: int, key: str, future: Future
+    ) -> None:
+        try:
+            image: np.ndarray | None = future.result()
+        except Exception:
+            image = None
+        self._slots.release()
+
+        with self._store_lock:
+            if image is not None and self._store is not None:
+                self._store.put(key, image)
+                self._store.flush()
+        self._finish(style, generation, image)
+        return
+
+    def _finish(
+        self, style: StyleSpec, generation: int, image: np.ndarray | None
+    ) -> None:
+        with self._cond:
+            self._done.append((style, generation, image))
+        return
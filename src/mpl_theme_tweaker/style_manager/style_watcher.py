@@ -0,0 +1,253 @@
+"""StyleWatcher
+
+Functionality:
+    - Watch a style directory recursively for added, removed, renamed and
+      edited .mplstyle files, on a background thread.
+    - Use inotify through ctypes where available, otherwise poll the
+      mtimes of the directories and style files.
+    - Throttle bursts of events, e.g. a `git checkout`, into one batch,
+      which the main thread takes once per frame.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import warnings
+from pathlib import Path
+
+from mpl_theme_tweaker.style_manager.style_scanner import STYLE_SUFFIX
+
+# a batch is handed over once no event came for DEBOUNCE_DELAY seconds,
+# or MAX_BATCH_DELAY seconds after its first event
+DEBOUNCE_DELAY = 0.3
+MAX_BATCH_DELAY = 2.0
+POLL_INTERVAL = 2.0
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+# events which add, remove or rename an entry
+_IN_LISTING_MASK = (
+    _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc() -> ctypes.CDLL | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _walk_dirs(root: str) -> list[str]:
+    """`root` and its subdirectories, symlinked directories aren't followed."""
+    dirs = [root]
+    for path in dirs:
+        try:
+            with os.scandir(path) as it:
+                dirs.extend(
+                    entry.path for entry in it if entry.is_dir(follow_symlinks=False)
+                )
+        except OSError:
+            continue
+    return dirs
+
+
+class StyleWatcher:
+    """Watch `root`, call `take_changes` once per frame on the main thread."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.backend: str = ""
+
+        self._changed: set[Path] = set()
+        self._listing_changed: bool = False
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="StyleWatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        return
+
+    def take_changes(self) -> tuple[set[Path], bool] | None:
+        """The style files changed since the last call, and whether files were
+        added, removed or renamed, None if nothing changed."""
+        with self._lock:
+            if not self._changed and not self._listing_changed:
+                return None
+            changes = (self._changed, self._listing_changed)
+            self._changed = set()
+            self._listing_changed = False
+        return changes
+
+    def _publish(self, changed: set[Path], listing_changed: bool) -> None:
+        with self._lock:
+            self._changed |= changed
+            self._listing_changed |= listing_changed
+        return
+
+    def _run(self) -> None:
+        try:
+            if not self._watch_inotify():
+                self._watch_polling()
+        except Exception as e:
+            warnings.warn(f"Stopped watching `{self.root}`: {e}", UserWarning)
+        return
+
+    def _watch_inotify(self) -> bool:
+        """Watch with inotify until stopped, False if it isn't available."""
+        libc = _load_libc()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return False
+
+        watches: dict[int, str] = {}
+
+        def add_watches(root: str) -> bool:
+            for path in _walk_dirs(root):
+                wd = libc.inotify_add_watch(fd, os.fsencode(path), _IN_WATCH_MASK)
+                if wd >= 0:
+                    watches[wd] = path
+                elif ctypes.get_errno() == errno.ENOSPC:
+                    # out of watches, e.g. a huge tree
+                    return False
+            return True
+
+        try:
+            if not add_watches(str(self.root)):
+                return False
+            self.backend = "inotify"
+
+            changed: set[Path] = set()
+            listing_changed = False
+            first_event = last_event = 0.0
+            while not self._stopped.is_set():
+                readable, _, _ = select.select([fd], [], [], DEBOUNCE_DELAY / 2)
+                now = time.monotonic()
+                if readable:
+                    try:
+                        data = os.read(fd, 64 * 1024)
+                    except BlockingIOError:
+                        data = b""
+                    offset = 0
+                    while offset < len(data):
+                        wd, mask, _, size = _EVENT_HEADER.unpack_from(data, offset)
+                        offset += _EVENT_HEADER.size
+                        name = os.fsdecode(data[offset : offset + size].rstrip(b"\0"))
+                        offset += size
+
+                        folder = watches.get(wd)
+                        if mask & _IN_Q_OVERFLOW:
+                            # events were dropped, rescan everything
+                            listing_changed = True
+                        elif mask & _IN_IGNORED:
+                            watches.pop(wd, None)
+                        elif folder is None:
+                            continue
+                        elif mask & _IN_ISDIR:
+                            listing_changed = True
+                            if mask & (_IN_CREATE | _IN_MOVED_TO):
+                                add_watches(os.path.join(folder, name))
+                        elif mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                            listing_changed = True
+                        elif name.endswith(STYLE_SUFFIX):
+                            changed.add(Path(folder, name))
+                            listing_changed |= bool(mask & _IN_LISTING_MASK)
+                        else:
+                            continue
+                        if first_event == 0.0:
+                            first_event = now
+                        last_event = now
+
+                if first_event and (
+                    now - last_event > DEBOUNCE_DELAY
+                    or now - first_event > MAX_BATCH_DELAY
+                ):
+                    self._publish(changed, listing_changed)
+                    changed = set()
+                    listing_changed = False
+                    first_event = 0.0
+        finally:
+            os.close(fd)
+        return True
+
+    def _watch_polling(self) -> None:
+        """Compare the mtimes of the directories and style files every interval."""
+        self.backend = "polling"
+        stamps = self._poll_stamps()
+        while not self._stopped.wait(POLL_INTERVAL):
+            new_stamps = self._poll_stamps()
+            if new_stamps == stamps:
+                continue
+            changed = {
+                Path(path)
+                for path in stamps.keys() | new_stamps.keys()
+                if path.endswith(STYLE_SUFFIX)
+                and stamps.get(path) != new_stamps.get(path)
+            }
+            # a directory mtime changes when an entry is added, removed or renamed
+            listing_changed = stamps.keys() != new_stamps.keys() or any(
+                stamps[path] != new_stamps[path]
+                for path in new_stamps
+                if not path.endswith(STYLE_SUFFIX)
+            )
+            self._publish(changed, listing_changed)
+            stamps = new_stamps
+        return
+
+    def _poll_stamps(self) -> dict[str, int]:
+        stamps: dict[str, int] = {}
+        for folder in _walk_dirs(str(self.root)):
+            try:
+                stamps[folder] = os.stat(folder).st_mtime_ns
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if entry.name.endswith(STYLE_SUFFIX) and entry.is_file():
+                            stamps[entry.path] = entry.stat().st_mtime_ns
+            except OSError:
+                continue
+        return stamps
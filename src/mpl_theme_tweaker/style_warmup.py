@@ -0,0 +1,165 @@
+"""StyleWarmup
+
+Functionality:
+    - Render the preview of every style of the Style menu ahead of time, in
+      a pool of processes at idle priority, opt-in.
+    - Predict the rc snapshot the menu entry will produce, the current
+      snapshot with the style applied, and key the frame like a replot
+      does, so choosing the style finds it in the cache.
+    - Keep the frames in their own bounded RenderCache, the interactive
+      frames aren't evicted by the warm-up.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Container
+
+import numpy as np
+from matplotlib.style.core import STYLE_BLACKLIST
+
+from mpl_theme_tweaker.render import init_idle_render_process, render_in_process
+from mpl_theme_tweaker.render_cache import RenderCache, rc_hash
+from mpl_theme_tweaker.style_manager.style_cache import StyleSpec, style_cache
+
+
+class StyleWarmup:
+    """Pre-render the styles, call `poll` once per frame on the main thread."""
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.enabled: bool = False
+        self.tiled: bool = False
+        self.cache = RenderCache()
+
+        self.rendered: int = 0
+        self.failed: int = 0
+
+        self._executor: ProcessPoolExecutor | None = None
+        # cache key and rc dict of the frames left to render
+        self._jobs: deque[tuple[str, dict[str, Any]]] = deque()
+        self._futures: dict[Future, str] = {}
+        self._plan_id: int = 0
+        self._lock = threading.Lock()
+
+    def set_options(self, enabled: bool, cache_mb: int, tiled: bool) -> None:
+        self.cache.set_max_bytes(cache_mb * 2**20)
+        if tiled != self.tiled or not enabled:
+            # frames of the full figure and of the tiles differ slightly
+            self._stop()
+            self.cache.clear()
+        self.enabled = enabled
+        self.tiled = tiled
+        return
+
+    def plan(
+        self, base_rc: dict[str, Any], targets: list[tuple[StyleSpec, ...]]
+    ) -> None:
+        """Render every target, the styles applied in order on top of `base_rc`.
+
+        The frames are keyed by the predicted snapshot, which has the keys of
+        `base_rc`. The previous plan is dropped.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._plan_id += 1
+            self._jobs.clear()
+        threading.Thread(
+            target=self._plan,
+            args=(self._plan_id, base_rc, targets),
+            name="StyleWarmup",
+            daemon=True,
+        ).start()
+        return
+
+    def poll(self, idle: bool, cached: Container[str] = ()) -> None:
+        """Collect the finished frames, submit more while `idle`.
+
+        Keys in `cached` are already rendered and skipped.
+        """
+        for future in [future for future in self._futures if future.done()]:
+            key = self._futures.pop(future)
+            try:
+                frame: np.ndarray = future.result()
+            except Exception:
+                self.failed += 1
+                continue
+            self.cache.put(key, frame)
+            self.rendered += 1
+
+        if not self.enabled or not idle:
+            return
+        while len(self._futures) < self.max_workers:
+            with self._lock:
+                if not self._jobs:
+                    break
+                key, rc = self._jobs.popleft()
+            if key in self.cache or key in cached:
+                continue
+
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_idle_render_process,
+                    initargs=(self.tiled,),
+                )
+            self._futures[self._executor.submit(render_in_process, rc)] = key
+        return
+
+    def get(self, key: str) -> np.ndarray | None:
+        """The warmed frame of `key`, without counting a miss."""
+        if key not in self.cache:
+            return None
+        return self.cache.get(key)
+
+    def is_running(self) -> bool:
+        return bool(self._futures or self._jobs)
+
+    def status_text(self) -> str:
+        return (
+            f"warm-up {self.rendered} rendered, {len(self._jobs)} left,"
+            f" {self.cache.nbytes / 2**20:.1f} MB"
+        )
+
+    def shutdown(self) -> None:
+        self._stop()
+        return
+
+    def _stop(self) -> None:
+        with self._lock:
+            self._plan_id += 1
+            self._jobs.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._futures.clear()
+        return
+
+    def _plan(
+        self,
+        plan_id: int,
+        base_rc: dict[str, Any],
+        targets: list[tuple[StyleSpec, ...]],
+    ) -> None:
+        for styles in targets:
+            if plan_id != self._plan_id:
+                return
+            try:
+                style_rc = style_cache.merged(*styles)
+            except (OSError, ValueError):
+                continue
+
+            # the snapshot the menu entry will produce, hashed like a replot
+            rc = {key: style_rc.get(key, value) for key, value in base_rc.items()}
+            key = rc_hash(rc)
+            # the pool processes start from the defaults, like a render process
+            render_rc = {k: v for k, v in rc.items() if k not in STYLE_BLACKLIST}
+            with self._lock:
+                if plan_id != self._plan_id:
+                    return
+                self._jobs.append((key, render_rc))
+        return
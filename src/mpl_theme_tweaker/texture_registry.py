@@ -0,0 +1,255 @@
+"""TextureRegistry
+
+Functionality:
+    - Keep a record of every GL texture and pixel buffer of the app: its
+      owner, size and bytes.
+    - Delete the GL objects of an owner once it is garbage collected. The
+      deletion is queued and done on the main thread, which owns the context,
+      objects collected this way were never released and are logged as leaks.
+    - Keep the textures their owner can create again, e.g. combo icons,
+      under a memory budget by evicting the least recently created ones. The
+      other objects, e.g. the preview, don't count against it.
+    - Live totals for the status bar and the log.
+"""
+
+import inspect
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Literal
+
+from imgui_bundle import hello_imgui  # type: ignore
+from OpenGL.GL import glDeleteBuffers, glDeleteTextures
+
+GLObjectKind = Literal["texture", "buffer"]
+
+# seconds between two eviction log lines, the evictions in between are summed
+EVICTION_LOG_INTERVAL = 5.0
+
+
+@dataclass
+class TextureRecord:
+    kind: GLObjectKind
+    name: int
+    owner: str
+    width: int
+    height: int
+    bytes_per_pixel: int = 4
+    # weak reference to the callback evicting the texture, None if the owner
+    # can't create it again
+    on_evict: Callable[[], Callable[[], None] | None] | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.width * self.height * self.bytes_per_pixel
+
+    def evict_callback(self) -> Callable[[], None] | None:
+        """The eviction callback, None if there is none or its owner is gone."""
+        if self.on_evict is None:
+            return None
+        return self.on_evict()
+
+
+class TextureRegistry:
+    def __init__(self, budget_bytes: int = 256 * 2**20):
+        self.budget_bytes: int = budget_bytes
+        self.created: int = 0
+        self.deleted: int = 0
+        self.leaked: int = 0
+        self.evicted: int = 0
+
+        self._records: dict[tuple[GLObjectKind, int], TextureRecord] = {}
+        self._finalizers: dict[tuple[GLObjectKind, int], weakref.finalize] = {}
+        # objects whose owner was collected, finalizers run on any thread
+        self._orphans: list[tuple[GLObjectKind, int]] = []
+        self._lock = threading.Lock()
+        self._over_budget: bool = False
+        # evictions not logged yet, and when the last line was logged
+        self._unlogged_evictions: int = 0
+        self._eviction_log_time: float = 0.0
+
+    def register(
+        self,
+        name: int,
+        owner: object,
+        label: str,
+        width: int,
+        height: int,
+        kind: GLObjectKind = "texture",
+        bytes_per_pixel: int = 4,
+        on_evict: Callable[[], None] | None = None,
+    ) -> None:
+        """Record the GL object `name`, deleted when `owner` goes away.
+
+        `on_evict` is held weakly when it is a bound method, e.g. of `owner`,
+        a strong reference would keep the owner alive.
+        """
+        key = (kind, name)
+        evict_ref: Callable[[], Callable[[], None] | None] | None = None
+        if inspect.ismethod(on_evict):
+            evict_ref = weakref.WeakMethod(on_evict)
+        elif on_evict is not None:
+            evict_ref = lambda: on_evict  # noqa: E731
+        self._records[key] = TextureRecord(
+            kind,
+            name,
+            f"{type(owner).__name__}.{label}",
+            width,
+            height,
+            bytes_per_pixel,
+            evict_ref,
+        )
+        self._finalizers[key] = weakref.finalize(owner, self._orphan, key)
+        self.created += 1
+        hello_imgui.log(
+            hello_imgui.LogLevel.debug,
+            f"{kind} {name} created for {self._records[key].owner}"
+            f" ({self.stats_text()})",
+        )
+        return
+
+    def resize(
+        self, name: int, width: int, height: int, kind: GLObjectKind = "texture"
+    ) -> None:
+        record = self._records.get((kind, name))
+        if record is not None:
+            record.width = width
+            record.height = height
+        return
+
+    def release(self, name: int, kind: GLObjectKind = "texture") -> None:
+        """Delete the GL object now, call on the main thread."""
+        key = (kind, name)
+        finalizer = self._finalizers.pop(key, None)
+        if finalizer is not None:
+            finalizer.detach()
+        if self._records.pop(key, None) is not None:
+            self._delete(key)
+        return
+
+    def collect(self) -> None:
+        """Delete orphaned objects and enforce the budget, call every frame.
+
+        Runs on the main thread before the frame is built, so no draw command
+        still refers to a deleted texture.
+        """
+        with self._lock:
+            orphans, self._orphans = self._orphans, []
+
+        for key in orphans:
+            self._finalizers.pop(key, None)
+            record = self._records.pop(key, None)
+            if record is None:
+                continue
+            self.leaked += 1
+            hello_imgui.log(
+                hello_imgui.LogLevel.warning,
+                f"{record.kind} {record.name} of {record.owner} was never"
+                f" released, deleted ({record.nbytes / 2**10:.0f} KB)",
+            )
+            self._delete(key)
+
+        self._enforce_budget()
+        return
+
+    def set_budget(self, budget_bytes: int) -> None:
+        self.budget_bytes = budget_bytes
+        self._over_budget = False
+        return
+
+    def total_bytes(self) -> int:
+        return sum(record.nbytes for record in self._records.values())
+
+    def evictable_bytes(self) -> int:
+        """Bytes the budget applies to, of the objects which can be evicted."""
+        return sum(
+            record.nbytes
+            for record in self._records.values()
+            if record.on_evict is not None
+        )
+
+    def by_owner(self) -> dict[str, int]:
+        """Bytes held by every owner."""
+        totals: dict[str, int] = {}
+        for record in self._records.values():
+            totals[record.owner] = totals.get(record.owner, 0) + record.nbytes
+        return totals
+
+    def stats_text(self) -> str:
+        return (
+            f"GL objects {len(self._records)}, {self.total_bytes() / 2**20:.1f} MB,"
+            f" evictable {self.evictable_bytes() / 2**20:.1f}"
+            f" / {self.budget_bytes / 2**20:.0f} MB"
+        )
+
+    def _orphan(self, key: tuple[GLObjectKind, int]) -> None:
+        with self._lock:
+            self._orphans.append(key)
+        return
+
+    def _delete(self, key: tuple[GLObjectKind, int]) -> None:
+        kind, name = key
+        if kind == "texture":
+            glDeleteTextures([name])
+        else:
+            glDeleteBuffers(1, [name])
+        self.deleted += 1
+        return
+
+    def _enforce_budget(self) -> None:
+        self._log_evictions()
+        # e.g. the preview textures at a high dpi are over the budget alone,
+        # evicting the icons wouldn't free them
+        total = self.evictable_bytes()
+        if total <= self.budget_bytes:
+            self._over_budget = False
+            return
+
+        # oldest first, the owner drops all its textures at once
+        count = len(self._records)
+        for record in list(self._records.values()):
+            if total <= self.budget_bytes:
+                break
+            if (record.kind, record.name) not in self._records:
+                continue
+            on_evict = record.evict_callback()
+            if on_evict is None:
+                continue
+            on_evict()
+            self.release(record.name, record.kind)
+            total = self.evictable_bytes()
+
+        evicted = count - len(self._records)
+        self.evicted += evicted
+        self._unlogged_evictions += evicted
+        self._log_evictions()
+        if total > self.budget_bytes and not self._over_budget:
+            # only log once, until the budget changes
+            self._over_budget = True
+            hello_imgui.log(
+                hello_imgui.LogLevel.warning,
+                f"texture memory over budget, nothing left to evict"
+                f" ({self.stats_text()})",
+            )
+        return
+
+    def _log_evictions(self) -> None:
+        # a popup reopened every frame would evict every frame, log a sum
+        now = time.monotonic()
+        if (
+            not self._unlogged_evictions
+            or now - self._eviction_log_time < EVICTION_LOG_INTERVAL
+        ):
+            return
+        hello_imgui.log(
+            hello_imgui.LogLevel.info,
+            f"evicted {self._unlogged_evictions} textures ({self.stats_text()})",
+        )
+        self._unlogged_evictions = 0
+        self._eviction_log_time = now
+        return
+
+
+# every GL texture of the app goes through this registry
+registry = TextureRegistry()
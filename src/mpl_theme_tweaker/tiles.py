@@ -0,0 +1,135 @@
+"""TileRenderer
+
+Functionality:
+    - Render every demo panel, and the title strip, as its own tile.
+    - Every tile depends on the rc keys read while rendering it, a tile is
+      only rendered again when one of those keys changed, or when its pixel
+      size changed. Paint-only edits restyle the kept tile figure.
+    - Composite the tiles, and the figure frame, into the preview frame.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import matplotlib as mpl
+import matplotlib.colors as mcolors
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+
+from mpl_theme_tweaker.figure import (
+    FIGSIZE,
+    PANEL_GRID,
+    PANELS,
+    plot_panel_figure,
+    plot_title_figure,
+    title_family,
+)
+from mpl_theme_tweaker.paint import LiveFigureSet
+
+
+@dataclass
+class Tile:
+    name: str
+    # index in PANELS, None for the title strip
+    panel: int | None = None
+
+    def plot(self, size: tuple[int, int], dpi: float) -> Figure:
+        # half a pixel more, so that the Agg canvas rounds to `size`
+        figsize = ((size[0] + 0.5) / dpi, (size[1] + 0.5) / dpi)
+        if self.panel is None:
+            return plot_title_figure(figsize, dpi)
+        return plot_panel_figure(self.panel, figsize, dpi)
+
+
+TILES: list[Tile] = [Tile("title")] + [
+    Tile(name, index) for index, (name, _) in enumerate(PANELS)
+]
+
+
+def _split(total: int, n: int) -> list[int]:
+    return [total * (i + 1) // n - total * i // n for i in range(n)]
+
+
+def _title_height(dpi: float) -> int:
+    size = FontProperties(size=mpl.rcParams["figure.titlesize"]).get_size_in_points()
+    pad = mpl.rcParams["figure.constrained_layout.h_pad"]
+    return math.ceil((size * 1.6 / 72 + 2 * pad) * dpi)
+
+
+class TileRenderer:
+    """Render the demo figure tile by tile.
+
+    Tiles are plotted with the live rcParams, the rc dict passed to `render`
+    is the snapshot they stand for and only decides which tiles are stale.
+    """
+
+    def __init__(self):
+        # the kept figure of every tile, by dpi and tile name
+        self._tiles = LiveFigureSet()
+
+    def layout(
+        self, dpi: float | None = None
+    ) -> tuple[tuple[int, int], dict[str, tuple[int, int, int, int]]]:
+        """Frame size and pixel rect (x, y, width, height) of every tile."""
+        dpi = dpi or mpl.rcParams["figure.dpi"]
+        width = int(FIGSIZE[0] * dpi)
+        height = int(FIGSIZE[1] * dpi)
+        title_height = min(_title_height(dpi), height // 2)
+
+        nrows, ncols = PANEL_GRID
+        col_widths = _split(width, ncols)
+        row_heights = _split(height - title_height, nrows)
+
+        rects = {"title": (0, 0, width, title_height)}
+        for tile in TILES[1:]:
+            row, col = divmod(tile.panel, ncols)  # type: ignore
+            x = sum(col_widths[:col])
+            y = title_height + sum(row_heights[:row])
+            rects[tile.name] = (x, y, col_widths[col], row_heights[row])
+        return (width, height), rects
+
+    def render(
+        self, rc: dict[str, Any], timings: dict[str, float], dpi: float | None = None
+    ) -> np.ndarray:
+        """Render the tiles whose inputs changed and composite the frame."""
+        dpi = dpi or mpl.rcParams["figure.dpi"]
+        (width, height), rects = self.layout(dpi)
+        frame = np.zeros((height, width, 4), dtype=np.uint8)
+        for tile in TILES:
+            x, y, w, h = rects[tile.name]
+
+            start = time.perf_counter()
+            token: tuple = (w, h)
+            if tile.panel is None:
+                token += tuple(title_family() or ())
+            image, kind = self._tiles.get(dpi, tile.name).render(
+                lambda: tile.plot((w, h), dpi), rc, token=token
+            )
+            if kind != "kept":
+                name = tile.name if kind == "build" else f"{tile.name} {kind}"
+                timings[name] = time.perf_counter() - start
+
+            h = min(h, image.shape[0])
+            w = min(w, image.shape[1])
+            frame[y : y + h, x : x + w] = image[:h, :w]
+
+        start = time.perf_counter()
+        if mpl.rcParams["figure.frameon"]:
+            self._draw_frame(frame, dpi)
+        timings["composite"] = time.perf_counter() - start
+        return frame
+
+    def _draw_frame(self, frame: np.ndarray, dpi: float) -> None:
+        # the demo figure has a 2 pt frame, half of it is clipped by the canvas
+        width = max(1, round(dpi / 72))
+        color = np.asarray(mcolors.to_rgba(mpl.rcParams["figure.edgecolor"])) * 255
+        color = color.round().astype(np.uint8)
+
+        frame[:width] = color
+        frame[-width:] = color
+        frame[:, :width] = color
+        frame[:, -width:] = color
+        return
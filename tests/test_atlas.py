@@ -0,0 +1,44 @@
+import itertools
+
+from mpl_theme_tweaker.atlas import pack_regions
+
+
+def overlaps(a, b, padding: int) -> bool:
+    return (
+        a.x - padding < b.x + b.width + padding
+        and b.x - padding < a.x + a.width + padding
+        and a.y - padding < b.y + b.height + padding
+        and b.y - padding < a.y + a.height + padding
+    )
+
+
+def test_no_sizes_give_a_one_pixel_atlas():
+    assert pack_regions([]) == ((1, 1), [])
+
+
+def test_regions_keep_the_sizes_in_order():
+    sizes = [(10, 20), (30, 5), (7, 7)]
+    _, regions = pack_regions(sizes, padding=1)
+
+    assert [(region.width, region.height) for region in regions] == sizes
+
+
+def test_regions_fit_and_never_overlap():
+    sizes = [(w, h) for w, h in itertools.product([3, 17, 40], [5, 12, 33])] * 3
+    padding = 2
+    (width, height), regions = pack_regions(sizes, padding=padding)
+
+    # power of two sides
+    assert width & (width - 1) == 0
+    assert height & (height - 1) == 0
+    for region in regions:
+        assert region.x >= padding and region.y >= padding
+        assert region.x + region.width + padding <= width
+        assert region.y + region.height + padding <= height
+    for a, b in itertools.combinations(regions, 2):
+        assert not overlaps(a, b, padding)
+
+
+def test_the_widest_region_sets_the_minimum_width():
+    (width, _), _ = pack_regions([(300, 2), (2, 2)], padding=0)
+    assert width == 512
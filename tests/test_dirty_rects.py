@@ -0,0 +1,60 @@
+import numpy as np
+
+from mpl_theme_tweaker.opengl import DIRTY_ROW_GAP, MAX_DIRTY_RECTS, find_dirty_rects
+
+
+def blank(height: int = 200, width: int = 100) -> np.ndarray:
+    return np.zeros((height, width, 4), dtype=np.uint8)
+
+
+def test_identical_frames_have_no_dirty_rect():
+    assert find_dirty_rects(blank(), blank()) == []
+
+
+def test_one_changed_block_gives_its_bounding_box():
+    new = blank()
+    new[10:20, 30:45] = 255
+
+    assert find_dirty_rects(blank(), new) == [(30, 10, 15, 10)]
+
+
+def test_a_single_channel_change_is_found():
+    new = blank()
+    # only the alpha byte of one pixel
+    new[5, 7, 3] = 1
+
+    assert find_dirty_rects(blank(), new) == [(7, 5, 1, 1)]
+
+
+def test_close_rows_share_a_band():
+    new = blank()
+    new[10, 5] = 255
+    new[10 + DIRTY_ROW_GAP, 50] = 255
+
+    assert find_dirty_rects(blank(), new) == [(5, 10, 46, DIRTY_ROW_GAP + 1)]
+
+
+def test_distant_rows_get_their_own_band():
+    new = blank()
+    new[10, 5] = 255
+    new[11 + DIRTY_ROW_GAP, 50] = 255
+
+    assert find_dirty_rects(blank(), new) == [
+        (5, 10, 1, 1),
+        (50, 11 + DIRTY_ROW_GAP, 1, 1),
+    ]
+
+
+def test_the_band_count_is_capped():
+    height = 2 * (MAX_DIRTY_RECTS + 4) * (DIRTY_ROW_GAP + 1)
+    new = blank(height)
+    new[:: 2 * (DIRTY_ROW_GAP + 1), 0] = 255
+
+    rects = find_dirty_rects(blank(height), new)
+    assert len(rects) == MAX_DIRTY_RECTS
+
+    # the merged bands still cover every changed pixel
+    covered = np.zeros(new.shape[:2], dtype=bool)
+    for x, y, width, height in rects:
+        covered[y : y + height, x : x + width] = True
+    assert covered[new[..., 0] != 0].all()
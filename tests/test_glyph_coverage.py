@@ -0,0 +1,42 @@
+import numpy as np
+
+from mpl_theme_tweaker.glyph_coverage import (
+    codepoint_ranges,
+    ranges_cover,
+    text_codepoints,
+)
+
+
+def test_codepoint_ranges_merges_runs():
+    ranges = codepoint_ranges([5, 1, 2, 3, 10, 11, 3])
+    assert ranges.tolist() == [[1, 3], [5, 5], [10, 11]]
+
+
+def test_codepoint_ranges_of_nothing_is_empty():
+    ranges = codepoint_ranges([])
+    assert ranges.shape == (0, 2)
+
+
+def test_ranges_cover_checks_the_inclusive_bounds():
+    ranges = codepoint_ranges([1, 2, 3, 10, 11])
+    codepoints = np.array([0, 1, 3, 4, 9, 10, 11, 12], dtype=np.uint32)
+
+    assert ranges_cover(ranges, codepoints).tolist() == [
+        False,
+        True,
+        True,
+        False,
+        False,
+        True,
+        True,
+        False,
+    ]
+
+
+def test_empty_ranges_cover_nothing():
+    codepoints = np.array([1, 2], dtype=np.uint32)
+    assert not ranges_cover(codepoint_ranges([]), codepoints).any()
+
+
+def test_text_codepoints_skips_whitespace_and_controls():
+    assert text_codepoints("a b\ta\n数").tolist() == [ord("a"), ord("b"), ord("数")]
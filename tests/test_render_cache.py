@@ -0,0 +1,82 @@
+import numpy as np
+
+from mpl_theme_tweaker.render_cache import RenderCache, frame_digest, rc_hash
+
+
+def frame(value: int, size: int = 4) -> np.ndarray:
+    return np.full((size, size, 4), value, dtype=np.uint8)
+
+
+def test_rc_hash_ignores_the_key_order():
+    rc = {"lines.linewidth": 1.5, "axes.facecolor": "white"}
+    assert rc_hash(rc) == rc_hash(dict(reversed(rc.items())))
+
+
+def test_rc_hash_tells_values_apart():
+    assert rc_hash({"lines.linewidth": 1.5}) != rc_hash({"lines.linewidth": 2.0})
+    assert rc_hash({"a": 1}) != rc_hash({"b": 1})
+    assert rc_hash({"font.family": ["serif"]}) != rc_hash({"font.family": "serif"})
+
+
+def test_frame_digest_covers_the_shape_and_the_pixels():
+    assert frame_digest(frame(1)) == frame_digest(frame(1))
+    assert frame_digest(frame(1)) != frame_digest(frame(2))
+    assert frame_digest(np.zeros((2, 8, 4), np.uint8)) != frame_digest(
+        np.zeros((8, 2, 4), np.uint8)
+    )
+
+
+def test_get_counts_hits_and_misses():
+    cache = RenderCache()
+    cache.put("a", frame(1))
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_frames_are_evicted_first():
+    nbytes = frame(0).nbytes
+    cache = RenderCache(max_bytes=2 * nbytes)
+    cache.put("a", frame(1))
+    cache.put("b", frame(2))
+    # "a" is used again, "b" becomes the oldest
+    cache.get("a")
+    cache.put("c", frame(3))
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.nbytes == 2 * nbytes
+
+
+def test_put_again_replaces_the_frame():
+    cache = RenderCache()
+    cache.put("a", frame(1))
+    cache.put("a", frame(2))
+
+    assert len(cache) == 1
+    assert cache.nbytes == frame(0).nbytes
+    assert cache.get("a")[0, 0, 0] == 2
+
+
+def test_frames_over_the_budget_are_not_kept():
+    cache = RenderCache(max_bytes=frame(0).nbytes - 1)
+    cache.put("a", frame(1))
+
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_a_smaller_budget_evicts_at_once():
+    nbytes = frame(0).nbytes
+    cache = RenderCache()
+    for key in "abc":
+        cache.put(key, frame(1))
+
+    cache.set_max_bytes(nbytes)
+    assert list(key for key in "abc" if key in cache) == ["c"]
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
@@ -0,0 +1,74 @@
+from mpl_theme_tweaker.scheduler import ReplotScheduler
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+
+
+def test_edits_are_merged_into_one_replot():
+    callback = Counter()
+    scheduler = ReplotScheduler(callback, delay=0.0)
+
+    scheduler.request(["lines.linewidth"])
+    scheduler.request(["lines.linewidth", "axes.facecolor"])
+    scheduler.tick()
+
+    assert callback.calls == 1
+    assert scheduler.last_merged == 3
+    assert scheduler.total_edits == 3
+    assert scheduler.total_replots == 1
+    assert not scheduler.has_pending()
+
+
+def test_no_replot_before_the_delay():
+    callback = Counter()
+    scheduler = ReplotScheduler(callback, delay=60.0)
+
+    scheduler.request(["lines.linewidth"])
+    scheduler.tick()
+
+    assert callback.calls == 0
+    assert scheduler.has_pending()
+
+
+def test_no_replot_while_dragging():
+    callback = Counter()
+    scheduler = ReplotScheduler(callback, delay=0.0)
+
+    scheduler.request(["lines.linewidth"])
+    scheduler.tick(dragging=True)
+    assert callback.calls == 0
+
+    scheduler.tick()
+    assert callback.calls == 1
+
+
+def test_no_replot_without_edits():
+    callback = Counter()
+    scheduler = ReplotScheduler(callback, delay=0.0)
+
+    scheduler.request([])
+    scheduler.tick()
+
+    assert callback.calls == 0
+    assert scheduler.total_edits == 0
+
+
+def test_ignored_keys_skip_the_replot():
+    callback = Counter()
+    scheduler = ReplotScheduler(
+        callback, delay=0.0, is_ignored=lambda keys: keys == {"savefig.dpi"}
+    )
+
+    scheduler.request(["savefig.dpi"])
+    scheduler.tick()
+    assert callback.calls == 0
+    assert scheduler.total_skipped == 1
+
+    scheduler.request(["savefig.dpi", "lines.linewidth"])
+    scheduler.tick()
+    assert callback.calls == 1
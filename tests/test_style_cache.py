@@ -0,0 +1,109 @@
+import os
+
+import matplotlib as mpl
+import pytest
+
+from mpl_theme_tweaker.style_manager.style_cache import StyleCache
+
+
+def write_style(path, text: str, mtime_offset: int = 0) -> None:
+    path.write_text(text)
+    # a distinct mtime, however coarse the file system clock is
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset * 10**9))
+    return
+
+
+def test_library_styles_are_parsed_once():
+    cache = StyleCache()
+    first = cache.get("ggplot")
+    second = cache.get("ggplot")
+
+    assert first is second
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first["axes.facecolor"] == mpl.style.library["ggplot"]["axes.facecolor"]
+
+
+def test_aliases_share_an_entry():
+    cache = StyleCache()
+    cache.get("default")
+    cache.get("mpl20")
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_default_drops_the_blacklisted_keys():
+    rc = StyleCache().get("default")
+
+    assert "lines.linewidth" in rc
+    assert "backend" not in rc
+    assert "interactive" not in rc
+
+
+def test_edited_files_are_parsed_again(tmp_path):
+    path = tmp_path / "edited.mplstyle"
+    write_style(path, "lines.linewidth: 2\n")
+    cache = StyleCache()
+    assert cache.get(path)["lines.linewidth"] == 2.0
+    assert cache.get(str(path))["lines.linewidth"] == 2.0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write_style(path, "lines.linewidth: 3\n", mtime_offset=1)
+    assert cache.get(path)["lines.linewidth"] == 3.0
+    assert cache.misses == 2
+
+
+def test_blacklisted_keys_in_a_file_warn(tmp_path):
+    path = tmp_path / "backend.mplstyle"
+    write_style(path, "backend: agg\nlines.linewidth: 2\n")
+
+    with pytest.warns(UserWarning, match="backend"):
+        rc = StyleCache().get(path)
+    assert rc == {"lines.linewidth": 2.0}
+
+
+def test_missing_files_raise_oserror(tmp_path):
+    with pytest.raises(OSError):
+        StyleCache().get(tmp_path / "missing.mplstyle")
+
+
+def test_merged_applies_the_styles_in_order(tmp_path):
+    first = tmp_path / "first.mplstyle"
+    second = tmp_path / "second.mplstyle"
+    write_style(first, "lines.linewidth: 2\naxes.grid: True\n")
+    write_style(second, "lines.linewidth: 4\n")
+
+    rc = StyleCache().merged(first, second)
+    assert rc == {"lines.linewidth": 4.0, "axes.grid": True}
+
+
+def test_apply_writes_rcparams(tmp_path):
+    path = tmp_path / "wide.mplstyle"
+    write_style(path, "lines.linewidth: 5\n")
+
+    with mpl.rc_context():
+        StyleCache().apply("default", path)
+        assert mpl.rcParams["lines.linewidth"] == 5.0
+        assert mpl.rcParams["axes.facecolor"] == "white"
+
+
+def test_least_recently_used_styles_are_dropped():
+    cache = StyleCache(capacity=2)
+    cache.get("ggplot")
+    cache.get("bmh")
+    cache.get("ggplot")
+    cache.get("classic")
+
+    cache.get("ggplot")
+    assert cache.hits == 2
+    cache.get("bmh")
+    assert cache.misses == 4
+
+
+def test_clear_drops_every_style():
+    cache = StyleCache()
+    cache.get("ggplot")
+    cache.clear()
+    cache.get("ggplot")
+
+    assert cache.misses == 2
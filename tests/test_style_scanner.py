@@ -0,0 +1,80 @@
+import os
+import time
+from pathlib import Path
+
+from mpl_theme_tweaker.style_manager.style_scanner import (
+    StyleScanner,
+    load_style_index,
+    scan_directory,
+)
+
+
+def scan(root: Path, styles_map=None) -> StyleScanner:
+    scanner = StyleScanner(root, styles_map)
+    deadline = time.monotonic() + 10
+    while scanner.is_running():
+        assert time.monotonic() < deadline, "scan didn't finish"
+        time.sleep(0.01)
+    return scanner
+
+
+def make_tree(root: Path) -> None:
+    (root / "dark").mkdir(parents=True)
+    (root / "dark" / "nested").mkdir()
+    (root / "empty").mkdir()
+    (root / "a.mplstyle").write_text("lines.linewidth: 2\n")
+    (root / "notes.txt").write_text("not a style\n")
+    (root / "dark" / "b.mplstyle").write_text("axes.facecolor: black\n")
+    (root / "dark" / "nested" / "c.mplstyle").write_text("")
+    return
+
+
+def test_scan_directory_lists_styles_and_subdirectories(tmp_path):
+    make_tree(tmp_path)
+    assert scan_directory(str(tmp_path)) == (["a.mplstyle"], ["dark", "empty"])
+
+
+def test_scan_finds_every_style(tmp_path):
+    root = tmp_path / "styles"
+    make_tree(root)
+    scanner = scan(root)
+
+    assert scanner.styles_map == {
+        "root": [Path(root, "a.mplstyle")],
+        "dark": [Path(root, "dark", "b.mplstyle")],
+        os.path.join("dark", "nested"): [Path(root, "dark", "nested", "c.mplstyle")],
+    }
+    assert scanner.found == 3
+    assert scanner.listed == 4
+    assert scanner.reused == 0
+
+
+def test_rescan_lists_only_the_changed_directories(tmp_path):
+    root = tmp_path / "styles"
+    make_tree(root)
+    scan(root)
+    assert set(load_style_index(str(root))) == {
+        ".",
+        "dark",
+        "empty",
+        os.path.join("dark", "nested"),
+    }
+
+    scanner = scan(root)
+    assert (scanner.listed, scanner.reused) == (0, 4)
+
+    (root / "dark" / "d.mplstyle").write_text("")
+    # a distinct mtime, however coarse the file system clock is
+    stat = os.stat(root / "dark")
+    os.utime(root / "dark", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    scanner = scan(root, scanner.styles_map)
+    assert (scanner.listed, scanner.reused) == (1, 3)
+    assert scanner.styles_map["dark"] == [
+        Path(root, "dark", "b.mplstyle"),
+        Path(root, "dark", "d.mplstyle"),
+    ]
+
+
+def test_unknown_root_has_an_empty_index(tmp_path):
+    assert load_style_index(str(tmp_path / "never-scanned")) == {}
@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+
+from mpl_theme_tweaker.style_manager.style_thumbnails import (
+    THUMBNAIL_HEIGHT,
+    THUMBNAIL_WIDTH,
+    StyleThumbnails,
+    ThumbnailStore,
+)
+
+
+def image(value: int) -> np.ndarray:
+    return np.full((THUMBNAIL_HEIGHT, THUMBNAIL_WIDTH, 4), value, dtype=np.uint8)
+
+
+def saved_slots(store: ThumbnailStore) -> dict[str, int]:
+    return dict(json.loads(store.index_path.read_text())["slots"])
+
+
+def test_put_and_get(tmp_path):
+    store = ThumbnailStore(tmp_path, slots=4)
+    store.put("a", image(1))
+
+    assert store.get("a")[0, 0, 0] == 1
+    assert store.get("b") is None
+
+
+def test_thumbnails_persist_once_flushed(tmp_path):
+    store = ThumbnailStore(tmp_path, slots=4)
+    store.put("a", image(1))
+    store.put("b", image(2))
+    store.flush()
+    del store
+
+    store = ThumbnailStore(tmp_path, slots=4)
+    assert store.get("a")[0, 0, 0] == 1
+    assert store.get("b")[0, 0, 0] == 2
+
+
+def test_least_recently_used_slot_is_reused(tmp_path):
+    store = ThumbnailStore(tmp_path, slots=2)
+    store.put("a", image(1))
+    store.put("b", image(2))
+    # "a" is used again, "b" becomes the oldest
+    store.get("a")
+    store.put("c", image(3))
+
+    assert store.get("b") is None
+    assert store.get("a")[0, 0, 0] == 1
+    assert store.get("c")[0, 0, 0] == 3
+    assert sorted(store.index.values()) == [0, 1]
+
+
+def test_evicted_key_leaves_the_saved_index_before_its_slot_is_reused(tmp_path):
+    store = ThumbnailStore(tmp_path, slots=2)
+    store.put("a", image(1))
+    store.put("b", image(2))
+    store.flush()
+
+    store.put("c", image(3))
+    # not flushed yet, the saved index must not name the rewritten slot
+    assert saved_slots(store) == {"b": store.index["b"]}
+
+    reopened = ThumbnailStore(tmp_path, slots=2)
+    assert reopened.get("a") is None
+    assert reopened.get("b")[0, 0, 0] == 2
+
+
+def test_another_slot_count_starts_empty(tmp_path):
+    store = ThumbnailStore(tmp_path, slots=2)
+    store.put("a", image(1))
+    store.flush()
+    del store
+
+    store = ThumbnailStore(tmp_path, slots=3)
+    assert store.get("a") is None
+
+
+def test_results_rendered_before_forget_are_dropped():
+    thumbnails = StyleThumbnails()
+    style = "edited.mplstyle"
+    with thumbnails._cond:
+        thumbnails._queued.add(style)
+        generation = thumbnails._generations.get(style, 0)
+
+    thumbnails.forget({style})
+    # the render finishes after the edit, with the old content
+    thumbnails._finish(style, generation, image(1))
+    thumbnails.poll()
+
+    assert style not in thumbnails._textures
+    assert style not in thumbnails._failed
+    # requested again on the next hover
+    assert style not in thumbnails._queued